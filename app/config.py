@@ -17,4 +17,126 @@ FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_USER = os.getenv("DB_USER", "root")
 DB_NAME = os.getenv("DB_NAME", "banque_db_pfa")
-DB_PORT = int(os.getenv("DB_PORT", 3306))
\ No newline at end of file
+DB_PORT = int(os.getenv("DB_PORT", 3306))
+
+# Configuration du journal d'audit
+# "sync" : chaque log est écrit dans la transaction de la requête
+# "batched" : les logs sont mis en file et insérés par lots par un thread dédié
+AUDIT_LOG_MODE = os.getenv("AUDIT_LOG_MODE", "batched")
+AUDIT_LOG_QUEUE_SIZE = int(os.getenv("AUDIT_LOG_QUEUE_SIZE", 10000))
+AUDIT_LOG_BATCH_SIZE = int(os.getenv("AUDIT_LOG_BATCH_SIZE", 500))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.getenv("AUDIT_LOG_FLUSH_INTERVAL", 0.5))  # secondes
+
+# Configuration du hachage des mots de passe (pool dédié à bcrypt)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 32))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 5))  # secondes
+PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", 1))  # secondes
+
+# Configuration du pool de connexions (par moteur et par worker)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))  # secondes d'attente max d'une connexion
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # secondes, inférieur au wait_timeout MySQL
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Cache des utilisateurs authentifiés (id, rôle, département)
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", 60))  # secondes
+# Inclure le rôle et le département dans le JWT pour éviter toute lecture en base.
+# Un changement de rôle n'est alors pris en compte qu'à l'expiration du token.
+JWT_ROLE_CLAIMS = os.getenv("JWT_ROLE_CLAIMS", "false").lower() in ("1", "true", "yes")
+
+# Cache des JWT déjà vérifiés (clé : empreinte du token, expiration : claim exp)
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 10000))
+# Révocation des tokens (déconnexion, changement de mot de passe, suppression de compte)
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", 100000))  # révocations actives prévues
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", 0.001))
+# URL Redis pour partager les révocations entre workers ; nécessite le paquet redis
+REVOCATION_REDIS_URL = os.getenv("REVOCATION_REDIS_URL", "")
+
+# Configuration de l'envoi des emails en arrière-plan (outbox)
+EMAIL_FROM = os.getenv("EMAIL_FROM", SMTP_USERNAME)
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() in ("1", "true", "yes")  # false pour un serveur de test local
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", 10))  # secondes
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", 60))  # fermeture de la connexion inutilisée
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", 50))
+EMAIL_POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL", 5))  # secondes
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", 5))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", 30))
+EMAIL_CLAIM_TIMEOUT = float(os.getenv("EMAIL_CLAIM_TIMEOUT", 600))  # reprise des envois interrompus
+
+# Import groupé d'utilisateurs
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", 10000))
+
+# Rétention du journal d'audit : archivage puis purge par petits lots
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", 365))
+LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", "archives/logs")
+RETENTION_CHUNK_SIZE = int(os.getenv("RETENTION_CHUNK_SIZE", 1000))
+RETENTION_CHUNK_PAUSE = float(os.getenv("RETENTION_CHUNK_PAUSE", 0.05))  # secondes entre deux lots
+
+# Protection contre le brute force sur /auth/signin (fenêtre glissante par email et par IP)
+LOGIN_FAILURE_WINDOW = int(os.getenv("LOGIN_FAILURE_WINDOW", 300))  # secondes
+LOGIN_MAX_FAILURES_PER_EMAIL = int(os.getenv("LOGIN_MAX_FAILURES_PER_EMAIL", 5))
+LOGIN_MAX_FAILURES_PER_IP = int(os.getenv("LOGIN_MAX_FAILURES_PER_IP", 20))
+LOGIN_LOCKOUT_SECONDS = int(os.getenv("LOGIN_LOCKOUT_SECONDS", 900))
+LOGIN_GUARD_MAX_KEYS = int(os.getenv("LOGIN_GUARD_MAX_KEYS", 100000))  # éviction LRU au-delà
+# URL Redis (ex. redis://localhost:6379/0) pour partager les compteurs entre workers ; nécessite le paquet redis
+LOGIN_GUARD_REDIS_URL = os.getenv("LOGIN_GUARD_REDIS_URL", "")
+# Utiliser X-Forwarded-For pour l'IP client (uniquement derrière un proxy de confiance)
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "false").lower() in ("1", "true", "yes")
+
+# Flux SSE des événements d'audit (/logs/stream)
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", 1000))  # au-delà, l'abonné trop lent est déconnecté
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+SSE_REPLAY_LIMIT = int(os.getenv("SSE_REPLAY_LIMIT", 1000))  # événements rejoués depuis Last-Event-ID
+
+# Instrumentation (/metrics) et journal des requêtes SQL lentes (0 = désactivé)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", 100))  # requêtes lentes conservées en mémoire
+# Jeton attendu dans "Authorization: Bearer ..." pour lire /metrics (vide = accès libre, à réserver au réseau interne)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Démarrage : attente de la base avec délai exponentiel entre les tentatives
+DB_CONNECT_RETRIES = int(os.getenv("DB_CONNECT_RETRIES", 10))
+DB_CONNECT_BACKOFF = float(os.getenv("DB_CONNECT_BACKOFF", 0.5))  # secondes, doublé à chaque échec
+DB_CONNECT_MAX_BACKOFF = float(os.getenv("DB_CONNECT_MAX_BACKOFF", 10))
+DB_READY_TIMEOUT = float(os.getenv("DB_READY_TIMEOUT", 2))  # délai maximal du ping de /readyz
+# Développement uniquement : créer les tables manquantes au démarrage au lieu de lancer les migrations Alembic
+DB_CREATE_ALL = os.getenv("DB_CREATE_ALL", "false").lower() in ("1", "true", "yes")
+
+# Annuaire des utilisateurs (GET /users/) : taille de page et cache des totaux par filtre
+USER_PAGE_SIZE = int(os.getenv("USER_PAGE_SIZE", 100))
+USER_MAX_PAGE_SIZE = int(os.getenv("USER_MAX_PAGE_SIZE", 500))
+USER_COUNT_CACHE_SIZE = int(os.getenv("USER_COUNT_CACHE_SIZE", 1000))
+USER_COUNT_CACHE_TTL = float(os.getenv("USER_COUNT_CACHE_TTL", 60))  # secondes ; vidé à chaque écriture sur users
+
+# Requêtes conditionnelles (ETag / If-None-Match) sur les listes d'administration
+ETAG_CACHE_BYTES = int(os.getenv("ETAG_CACHE_BYTES", 32 * 1024 * 1024))  # corps sérialisés conservés en mémoire
+# Sans Redis, chaque worker ne voit que ses propres écritures : l'ETag change au moins toutes les N secondes
+ETAG_LOCAL_MAX_STALENESS = float(os.getenv("ETAG_LOCAL_MAX_STALENESS", 5))
+# URL Redis pour partager les versions des ressources entre workers ; nécessite le paquet redis
+RESOURCE_VERSION_REDIS_URL = os.getenv("RESOURCE_VERSION_REDIS_URL", "")
+
+# Réplique en lecture (REPLICA_DATABASE_URL, lue dans app/database.py) : au-delà de ce retard, lectures sur le primaire
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", 5))  # secondes entre deux contrôles de santé
+
+# Profilage à la demande : en-tête "X-Profile: 1" ou paramètre ?profile=1, réservé aux administrateurs
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+# Fraction des requêtes profilées d'office, sans drapeau (0 = aucune)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", 50))  # profils conservés, les plus anciens sont supprimés
+
+# Ingestion des transactions (POST /transactions/batch) et règles de détection des fraudes
+TRANSACTION_BATCH_MAX_ROWS = int(os.getenv("TRANSACTION_BATCH_MAX_ROWS", 10000))
+FRAUD_AMOUNT_THRESHOLD = float(os.getenv("FRAUD_AMOUNT_THRESHOLD", 10000))
+# Listes séparées par des virgules : codes pays ISO (ex. "KP,IR") et noms de commerçants
+FRAUD_BLOCKED_COUNTRIES = os.getenv("FRAUD_BLOCKED_COUNTRIES", "")
+FRAUD_BLOCKED_MERCHANTS = os.getenv("FRAUD_BLOCKED_MERCHANTS", "")
+# Plage horaire à risque (heures UTC, fin exclue ; peut passer minuit, ex. 22 -> 5) et montant à partir duquel elle compte
+FRAUD_NIGHT_START_HOUR = int(os.getenv("FRAUD_NIGHT_START_HOUR", 0))
+FRAUD_NIGHT_END_HOUR = int(os.getenv("FRAUD_NIGHT_END_HOUR", 5))
+FRAUD_NIGHT_AMOUNT_THRESHOLD = float(os.getenv("FRAUD_NIGHT_AMOUNT_THRESHOLD", 1000))
+FRAUD_ALERT_SCORE = int(os.getenv("FRAUD_ALERT_SCORE", 50))  # score (0-100) à partir duquel une alerte est levée
@@ -1,12 +1,32 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+import asyncio
+import logging
 import os
 from dotenv import load_dotenv
 from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, OperationalError
+from app.config import (
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_CONNECT_RETRIES,
+    DB_CONNECT_BACKOFF,
+    DB_CONNECT_MAX_BACKOFF
+)
+from app.utils.pool_metrics import TimedQueuePool, TimedAsyncAdaptedQueuePool, instrument_engine
+from app.utils.metrics import instrument_queries
+from app.utils.replica import ReplicaHealth
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Charger les variables d'environnement
 DB_HOST = os.getenv("DB_HOST")
 DB_USER = os.getenv("DB_USER")
@@ -14,12 +34,114 @@ DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_NAME = os.getenv("DB_NAME")
 DB_PORT = os.getenv("DB_PORT")
 
-# URL de connexion MySQL
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# URL de connexion MySQL (DATABASE_URL permet de la remplacer, ex. sqlite:///./local.db en local)
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+# Pilotes asynchrones correspondant aux pilotes synchrones
+ASYNC_DRIVERS = {
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    scheme, separator, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(SQLALCHEMY_DATABASE_URL))
+
+def pool_options(url: str, pool_class, name: str) -> dict:
+    """
+    Paramètres du pool de connexions, configurables via app/config.py
+    """
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        # Base SQLite en mémoire : pool spécifique à une seule connexion, on garde celui par défaut
+        return {}
+    return {
+        "poolclass": pool_class,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_logging_name": name,
+    }
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Moteur synchrone : scripts, threads d'arrière-plan (journal d'audit)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **pool_options(SQLALCHEMY_DATABASE_URL, TimedQueuePool, "primary"))
+instrument_engine(engine, "primary")
+instrument_queries(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Moteur asynchrone : routes FastAPI
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    **pool_options(ASYNC_SQLALCHEMY_DATABASE_URL, TimedAsyncAdaptedQueuePool, "primary_async")
+)
+instrument_engine(async_engine, "primary_async")
+instrument_queries(async_engine)
+
+# Réplique en lecture optionnelle (ex. REPLICA_DATABASE_URL=sqlite:///./replica.db en local)
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL", "")
+replica_async_engine = None
+if REPLICA_DATABASE_URL:
+    ASYNC_REPLICA_DATABASE_URL = os.getenv("ASYNC_REPLICA_DATABASE_URL", to_async_url(REPLICA_DATABASE_URL))
+    replica_async_engine = create_async_engine(
+        ASYNC_REPLICA_DATABASE_URL,
+        **pool_options(ASYNC_REPLICA_DATABASE_URL, TimedAsyncAdaptedQueuePool, "replica_async")
+    )
+    instrument_engine(replica_async_engine, "replica_async")
+    instrument_queries(replica_async_engine)
+replica_health = ReplicaHealth(replica_async_engine)
+
+class RoutingSession(Session):
+    """
+    Session sous-jacente des AsyncSession : choisit le moteur de chaque requête.
+    Seules les sessions ouvertes en lecture (info["read_only"]) vont sur la réplique, tant qu'elle est saine ;
+    dès qu'une session écrit, elle reste sur le primaire (lecture de ses propres écritures).
+    Une requête qui échoue sur la réplique (connexion perdue, base injoignable) est rejouée une fois
+    sur le primaire : seul un retard de réplication non encore détecté peut être servi au client.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary = async_engine.sync_engine
+        if not self.info.get("read_only") or replica_async_engine is None:
+            return primary
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info["wrote"] = True
+        if self.info.get("wrote") or self.info.get("force_primary"):
+            return primary
+        if not replica_health.healthy:
+            replica_health.fallbacks += 1
+            return primary
+        self.info["on_replica"] = True
+        return replica_async_engine.sync_engine
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _retry_on_primary(orm_execute_state):
+    session = orm_execute_state.session
+    if not session.info.get("read_only") or replica_async_engine is None:
+        return None
+    session.info["on_replica"] = False
+    try:
+        return orm_execute_state.invoke_statement()
+    except DBAPIError as e:
+        if not session.info.get("on_replica") or not (e.connection_invalidated or isinstance(e, OperationalError)):
+            raise
+        # La réplique est déjà déclassée par ReplicaHealth (handle_error) ; la suite de la session reste sur le primaire
+        logger.warning("Lecture rejouée sur le primaire après une erreur de la réplique : %s", e.orig)
+        session.info["force_primary"] = True
+        replica_health.fallbacks += 1
+        return orm_execute_state.invoke_statement()
+
+# expire_on_commit=False : accéder à un objet après commit ne doit pas déclencher de requête implicite
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 # Dependency pour les routes
@@ -30,14 +152,35 @@ def get_db():
     finally:
         db.close()
 
-# Fonction de test de la connexion à la base
-def test_connection():
-    try:
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))  # requête déclarée correctement
-        print("✅ Connexion à la base de données réussie.")
-    except Exception as e:
-        print("❌ Erreur de connexion à la base de données :", e)
-    finally:
-        db.close()
-  
\ No newline at end of file
+# Dependency asynchrone pour les routes
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependency asynchrone pour les routes en lecture seule (GET) : réplique si elle est configurée et saine
+async def get_read_db():
+    async with AsyncSessionLocal(info={"read_only": True}) as db:
+        yield db
+
+async def check_connection():
+    """
+    Aller-retour minimal vers la base (lève une exception si elle est injoignable)
+    """
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+async def wait_for_database(retries: int = DB_CONNECT_RETRIES, backoff: float = DB_CONNECT_BACKOFF,
+                            max_backoff: float = DB_CONNECT_MAX_BACKOFF):
+    """
+    Attend que la base réponde (appelé au démarrage), avec délai exponentiel entre les tentatives
+    """
+    for attempt in range(1, retries + 1):
+        try:
+            await check_connection()
+            return
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = min(max_backoff, backoff * 2 ** (attempt - 1))
+            logger.warning("Base de données injoignable (tentative %d/%d) : %s ; nouvel essai dans %.1f s", attempt, retries, e, delay)
+            await asyncio.sleep(delay)
@@ -1,26 +1,75 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.database import engine, test_connection
-from app.models.users.user import Base
+from fastapi.concurrency import run_in_threadpool
+from app.database import Base, async_engine, replica_async_engine, replica_health, wait_for_database
 from app.routers.auth import router as auth_router
 from app.routers.users import router as users_router
 from app.routers.logs import router as logs_router
+from app.routers.monitoring import router as monitoring_router
+from app.routers.metrics import router as metrics_router
+from app.routers.health import router as health_router
+from app.routers.transactions import router as transactions_router
+from app.utils.log_sink import log_sink
+from app.utils.hashing import password_hasher
+from app.utils.email_dispatcher import email_dispatcher
+from app.utils.event_broker import event_broker
+from app.utils.conditional import resource_versions
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiling import ProfilingMiddleware
+from app.config import DB_CREATE_ALL, PROFILING_ENABLED, PROFILE_SAMPLE_RATE
 
-# Créer toutes les tables
-Base.metadata.create_all(bind=engine)
+# Le schéma est géré par les migrations Alembic (alembic upgrade head) ; l'import du module
+# n'ouvre aucune connexion : la base n'est contactée qu'au démarrage, dans le lifespan.
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await wait_for_database()
+    if DB_CREATE_ALL:
+        # Développement uniquement (ex. SQLite local) : tables créées sans passer par les migrations
+        async with async_engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+    event_broker.bind(asyncio.get_running_loop())
+    resource_versions.bind(asyncio.get_running_loop())
+    log_sink.start()
+    email_dispatcher.start()
+    # Contrôle périodique de la réplique (lectures sur le primaire tant qu'elle n'est pas jugée saine)
+    replica_health.start()
+    app.state.started = True
+    yield
+    app.state.started = False
+    await replica_health.stop()
+    await run_in_threadpool(email_dispatcher.stop)
+    # Vider la file du journal d'audit avant l'arrêt du worker
+    await run_in_threadpool(log_sink.stop)
+    await run_in_threadpool(password_hasher.shutdown)
+    await async_engine.dispose()
+    if replica_async_engine is not None:
+        await replica_async_engine.dispose()
 
 app = FastAPI(
     title="Application Bancaire - Détection des Fraudes",
     description="API pour la gestion des utilisateurs et la détection automatique des transactions frauduleuses.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Inclure les routeurs
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(logs_router)
+app.include_router(transactions_router)
+app.include_router(monitoring_router)
+app.include_router(metrics_router)
+app.include_router(health_router)
+
+# Profilage à la demande : absent de la chaîne (aucun surcoût) s'il n'est pas activé.
+# Ajouté avant MetricsMiddleware pour s'exécuter à l'intérieur et relever les requêtes SQL de la requête.
+if PROFILING_ENABLED or PROFILE_SAMPLE_RATE > 0:
+    app.add_middleware(ProfilingMiddleware)
 
-# Tester la connexion à la base de données
-test_connection()
+# Latence, requêtes SQL et temps de hachage par route (exposés sur /metrics)
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
 def read_root():
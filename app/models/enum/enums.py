@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntFlag
 
 class Role(str, Enum):
     ADMIN = "admin"
@@ -8,4 +8,43 @@ class AnalystDepartment(str, Enum):
     IT = "IT"
     FINANCE = "Finance"
     HR = "HR"
-    MARKETING = "Marketing"
\ No newline at end of file
+    MARKETING = "Marketing"
+
+class EmailStatus(str, Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+class LogAction(int, Enum):
+    """
+    Actions du journal d'audit, stockées sur un petit entier (table de correspondance log_actions).
+    Ne jamais renuméroter : les codes sont persistés.
+    """
+    UNKNOWN = 0  # Action historique non répertoriée (texte d'origine conservé dans details)
+    LOGIN_SUCCESS = 1
+    LOGIN_FAILED = 2
+    UPDATE_PROFILE_SUCCESS = 3
+    UPDATE_PROFILE_FAILED = 4
+    CHANGE_PASSWORD_SUCCESS = 5
+    CHANGE_PASSWORD_FAILED = 6
+    FRAUD_ALERT = 7
+
+    @property
+    def label(self) -> str:
+        # Nom exposé par l'API et utilisé dans le code (ex. "login_failed")
+        return self.name.lower()
+
+class FraudRule(IntFlag):
+    """
+    Règles de détection déclenchées par une transaction, stockées en masque de bits (transactions.triggered_rules).
+    Ne jamais renuméroter : les valeurs sont persistées.
+    """
+    AMOUNT_THRESHOLD = 1
+    BLOCKED_COUNTRY = 2
+    BLOCKED_MERCHANT = 4
+    NIGHT_TIME = 8
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
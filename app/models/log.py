@@ -1,15 +1,75 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, SmallInteger, String, ForeignKey, DateTime, Index, JSON, TypeDecorator, event, insert
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.enum.enums import LogAction
 from datetime import datetime
 
+# Correspondance nom d'action -> code stocké
+LOG_ACTION_CODES = {action.label: action.value for action in LogAction}
+
+class LogActionType(TypeDecorator):
+    """
+    Action stockée sur un SMALLINT mais manipulée comme une chaîne ("login_failed") côté Python :
+    filtres, insertions et lectures gardent les noms d'action.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return LOG_ACTION_CODES[value]
+        except KeyError:
+            raise ValueError(f"Action de log inconnue : {value}")
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return LogAction(value).label
+
 class Log(Base):
     __tablename__ = "logs"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
-    action = Column(String(50), nullable=False)  # Specify length, e.g., 50
-    description = Column(String(255), nullable=True)  # Specify length, e.g., 255
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Colonne action_id en base, clé Python "action" (filtres, insertions Core, index)
+    action = Column("action_id", LogActionType(), key="action", nullable=False)
+    # Paramètres de l'événement (motif, champs modifiés...) ; la description est rendue à la lecture
+    details = Column(JSON(none_as_null=True), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    user = relationship("User", back_populates="logs")
+
+    # Index composites pour la pagination par curseur (created_at, id) :
+    # chaque page est servie par un parcours d'intervalle sur l'index, avec ou sans filtre
+    __table_args__ = (
+        Index("ix_logs_created_at_id", "created_at", "id"),
+        Index("ix_logs_action_id_created_at_id", "action", "created_at", "id"),  # clé Python de la colonne action_id
+        Index("ix_logs_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
+
+class LogActionName(Base):
+    """
+    Table de correspondance des codes d'action (lecture SQL directe, jointures de reporting)
+    """
+    __tablename__ = "log_actions"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    name = Column(String(50), unique=True, nullable=False)
+
+@event.listens_for(LogActionName.__table__, "after_create")
+def _seed_log_actions(table, connection, **kwargs):
+    connection.execute(insert(table), [{"id": code, "name": name} for name, code in LOG_ACTION_CODES.items()])
+
+
+class LogActionCount(Base):
+    """
+    Compteurs agrégés par (action, heure), maintenus à chaque insertion dans logs
+    """
+    __tablename__ = "log_action_counts"
 
-    user = relationship("User", back_populates="logs")
\ No newline at end of file
+    action = Column("action_id", LogActionType(), key="action", primary_key=True)
+    bucket = Column(DateTime, primary_key=True)  # Début de l'heure (UTC)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, SmallInteger, String, Numeric, Boolean, DateTime, ForeignKey, Index
+from app.database import Base
+from datetime import datetime
+
+class Transaction(Base):
+    """
+    Transaction ingérée par lot et notée par le moteur de règles (app/utils/fraud_rules.py)
+    """
+    __tablename__ = "transactions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    external_id = Column(String(64), unique=True, index=True, nullable=False)  # Identifiant côté émetteur : rejouer un lot ne crée pas de doublon
+    account_id = Column(String(64), nullable=False)
+    amount = Column(Numeric(14, 2), nullable=False)
+    currency = Column(String(3), nullable=False)
+    country = Column(String(2), nullable=False)  # Code pays ISO 3166-1 alpha-2
+    merchant = Column(String(100), nullable=False)
+    occurred_at = Column(DateTime, nullable=False)  # UTC
+    fraud_score = Column(SmallInteger, nullable=False)
+    triggered_rules = Column(SmallInteger, nullable=False, default=0)  # Masque de bits FraudRule
+    is_fraud = Column(Boolean, nullable=False)
+    ingested_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Consultation des alertes par date et de l'historique d'un compte
+    __table_args__ = (
+        Index("ix_transactions_is_fraud_occurred_at", "is_fraud", "occurred_at"),
+        Index("ix_transactions_account_id_occurred_at", "account_id", "occurred_at"),
+    )
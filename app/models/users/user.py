@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum
+from sqlalchemy import Column, Integer, String, Enum, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from app.models.enum.enums import Role, AnalystDepartment
@@ -7,14 +7,23 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
-    password = Column(String, nullable=True)  # Nullable pour les utilisateurs créés sans mot de passe
-    firstName = Column(String, nullable=False)
-    lastName = Column(String, nullable=False)
-    phoneNumber = Column(String, nullable=True)
+    email = Column(String(255), unique=True, index=True, nullable=False)
+    password = Column(String(255), nullable=True)  # Nullable pour les utilisateurs créés sans mot de passe
+    firstName = Column(String(255), nullable=False)
+    lastName = Column(String(255), nullable=False)
+    phoneNumber = Column(String(50), nullable=True)
     department = Column(Enum(AnalystDepartment), nullable=False)
     role = Column(Enum(Role), default=Role.ANALYST, nullable=False)
 
     # Relation utilisant le nom de classe en string pour éviter l'import circulaire
     reset_tokens = relationship("ResetToken", back_populates="user")
-    logs = relationship("Log", back_populates="user")
\ No newline at end of file
+    logs = relationship("Log", back_populates="user")
+
+    # Index composites de l'annuaire (GET /users/) : filtres département/rôle puis curseur sur l'id ;
+    # recherche par préfixe de nom (l'email est déjà couvert par son index unique)
+    __table_args__ = (
+        Index("ix_users_department_role_id", "department", "role", "id"),
+        Index("ix_users_role_id", "role", "id"),
+        Index("ix_users_lastName_firstName", "lastName", "firstName"),
+        Index("ix_users_firstName", "firstName"),
+    )
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Cookie, Depends, HTTPException, status, Response, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_read_db
 from app.models.users.user import User
 from app.schemas.user import (
     UserCreate, 
@@ -9,20 +10,23 @@ from app.schemas.user import (
     UserUpdateProfil,
     ChangePasswordRequest
 )
-from passlib.context import CryptContext
-from app.utils.jwt import create_access_token, get_current_user
+from secrets import compare_digest
+from app.utils.hashing import password_hasher
+from jose import JWTError
+from app.utils.jwt import create_access_token, decode_access_token, get_current_user
+from app.utils.revocation import token_revocation
+from app.utils.principal import principal_claims, invalidate_principal
 from app.config import ACCESS_TOKEN_EXPIRE_MINUTES
-from app.models.log import Log
+from app.utils.log_sink import log_sink
+from app.utils.login_guard import login_guard, client_ip
+from app.utils.conditional import pin_recent_writes
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-# Configuration pour le hachage des mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 @router.post("/signup", response_model=UserResponse)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Vérifier si l'email existe déjà
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).filter(User.email == user.email))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -30,7 +34,7 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Hacher le mot de passe
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = await password_hasher.ahash(user.password)
     
     # Créer un nouvel utilisateur
     new_user = User(
@@ -44,43 +48,55 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
 
 @router.post("/signin")
-def signin(user: UserLogin, db: Session = Depends(get_db), response: Response = None):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def signin(user: UserLogin, request: Request, db: AsyncSession = Depends(get_async_db), response: Response = None):
+    # Refuser tout de suite un email ou une IP verrouillés, avant la base et bcrypt
+    ip = client_ip(request)
+    await login_guard.check(user.email, ip)
+
+    db_user = await db.scalar(select(User).filter(User.email == user.email))
     if not db_user:
+        await login_guard.record_failure(user.email, ip)
         # Enregistrer une tentative de connexion échouée
-        log = Log(
+        await log_sink.record(
+            db,
             user_id=None,
             action="login_failed",
-            description=f"Tentative de connexion échouée pour l'email {user.email}"
+            details={"reason": "unknown_email", "email": user.email}
         )
-        db.add(log)
-        db.commit()
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou mot de passe incorrect"
         )
 
-    if not pwd_context.verify(user.password, db_user.password):
-        log = Log(
+    valid, new_hash = await password_hasher.averify_and_update(user.password, db_user.password)
+    if not valid:
+        await login_guard.record_failure(user.email, ip)
+        await log_sink.record(
+            db,
             user_id=db_user.id,
             action="login_failed",
-            description="Mot de passe incorrect"
+            details={"reason": "wrong_password"}
         )
-        db.add(log)
-        db.commit()
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou mot de passe incorrect"
         )
 
-    access_token = create_access_token(data={"sub": str(db_user.id)})
+    await login_guard.record_success(user.email)
+
+    # Re-hacher de façon transparente si le hash stocké utilise des paramètres obsolètes
+    if new_hash:
+        db_user.password = new_hash
+        await db.commit()
+
+    access_token = create_access_token(data={"sub": str(db_user.id), **principal_claims(db_user)})
     response.set_cookie(
         key="access_token",
         value=f"Bearer {access_token}",
@@ -91,24 +107,24 @@ def signin(user: UserLogin, db: Session = Depends(get_db), response: Response =
     )
 
     # Enregistrer une connexion réussie
-    log = Log(
+    await log_sink.record(
+        db,
         user_id=db_user.id,
-        action="login_success",
-        description="Connexion réussie"
+        action="login_success"
     )
-    db.add(log)
-    db.commit()
 
     return {"message": "Connexion réussie", "user_id": db_user.id}
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_profile(
+async def get_current_user_profile(
     user_id: str = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
+    # Juste après une mise à jour du profil, lire sur le primaire plutôt que sur une réplique en retard
+    pin_recent_writes(db, "users")
     # Récupérer l'utilisateur depuis la base de données
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = await db.scalar(select(User).filter(User.id == user_id))
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -117,7 +133,13 @@ def get_current_user_profile(
     return db_user
 
 @router.post("/signout")
-def signout(response: Response):
+async def signout(response: Response, access_token: str = Cookie(None, alias="access_token")):
+    # Révoquer le token jusqu'à son expiration : une copie du cookie ne doit plus être acceptée
+    if access_token:
+        try:
+            await token_revocation.revoke(decode_access_token(access_token.replace("Bearer ", "")))
+        except JWTError:
+            pass  # Token invalide ou expiré : rien à révoquer
     # Supprimer le cookie access_token
     response.delete_cookie(
         key="access_token",
@@ -128,24 +150,23 @@ def signout(response: Response):
     return {"message": "Déconnexion réussie"}
 
 @router.put("/update-profile", response_model=UserResponse)
-def update_profile(
+async def update_profile(
     user_update: UserUpdateProfil,
     user_id: str = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Met à jour les informations du profil utilisateur
     """
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = await db.scalar(select(User).filter(User.id == user_id))
     if not db_user:
         # Log failed attempt
-        log = Log(
+        await log_sink.record(
+            db,
             user_id=None,
             action="update_profile_failed",
-            description=f"Tentative de mise à jour du profil pour un utilisateur non trouvé (ID: {user_id})"
+            details={"reason": "user_not_found", "subject": user_id}
         )
-        db.add(log)
-        db.commit()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Utilisateur non trouvé"
@@ -153,16 +174,15 @@ def update_profile(
     
     # Vérifier si l'email est modifié et existe déjà
     if user_update.email and user_update.email != db_user.email:
-        existing_user = db.query(User).filter(User.email == user_update.email).first()
+        existing_user = await db.scalar(select(User).filter(User.email == user_update.email))
         if existing_user:
             # Log failed attempt due to email conflict
-            log = Log(
+            await log_sink.record(
+                db,
                 user_id=db_user.id,
                 action="update_profile_failed",
-                description=f"Tentative de mise à jour de l'email à {user_update.email} échouée : email déjà utilisé"
+                details={"reason": "email_taken", "email": user_update.email}
             )
-            db.add(log)
-            db.commit()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email déjà utilisé par un autre utilisateur"
@@ -170,42 +190,44 @@ def update_profile(
     
     # Mettre à jour tous les champs non-None de user_update
     update_data = user_update.model_dump(exclude_unset=True)
-    updated_fields = ", ".join(f"{key}={value}" for key, value in update_data.items())
     for field, value in update_data.items():
         setattr(db_user, field, value)
     
     # Log successful profile update
-    log = Log(
+    await log_sink.record(
+        db,
         user_id=db_user.id,
         action="update_profile_success",
-        description=f"Profil mis à jour : {updated_fields}" if updated_fields else "Profil mis à jour (aucun champ modifié)"
+        details={"fields": user_update.model_dump(mode="json", exclude_unset=True)} if update_data else {"reason": "no_change"},
+        commit=False,
+        transactional=True
     )
-    db.add(log)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    invalidate_principal(db_user.id)
     
     return db_user
 
 # routers/auth.py
 @router.put("/change-password")
-def change_password(
+async def change_password(
     password_data: ChangePasswordRequest,
+    response: Response,
     user_id: str = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Change le mot de passe de l'utilisateur
+    Change le mot de passe de l'utilisateur ; toutes ses sessions (y compris celle-ci) sont révoquées
     """
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = await db.scalar(select(User).filter(User.id == user_id))
     if not db_user:
         # Log failed attempt
-        log = Log(
+        await log_sink.record(
+            db,
             user_id=None,
             action="change_password_failed",
-            description=f"Tentative de changement de mot de passe pour un utilisateur non trouvé (ID: {user_id})"
+            details={"reason": "user_not_found", "subject": user_id}
         )
-        db.add(log)
-        db.commit()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Utilisateur non trouvé"
@@ -214,58 +236,59 @@ def change_password(
     # Vérifier que les nouveaux mots de passe correspondent
     if password_data.new_password != password_data.confirm_new_password:
         # Log failed attempt
-        log = Log(
+        await log_sink.record(
+            db,
             user_id=db_user.id,
             action="change_password_failed",
-            description="Les nouveaux mots de passe ne correspondent pas"
+            details={"reason": "confirmation_mismatch"}
         )
-        db.add(log)
-        db.commit()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Les nouveaux mots de passe ne correspondent pas"
         )
     
     # Vérifier l'ancien mot de passe
-    if not pwd_context.verify(password_data.old_password, db_user.password):
+    if not await password_hasher.averify(password_data.old_password, db_user.password):
         # Log failed attempt
-        log = Log(
+        await log_sink.record(
+            db,
             user_id=db_user.id,
             action="change_password_failed",
-            description="Ancien mot de passe incorrect"
+            details={"reason": "wrong_old_password"}
         )
-        db.add(log)
-        db.commit()
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Ancien mot de passe incorrect"
         )
     
-    # Vérifier que le nouveau mot de passe est différent
-    if pwd_context.verify(password_data.new_password, db_user.password):
+    # Vérifier que le nouveau mot de passe est différent (l'ancien vient d'être vérifié,
+    # une comparaison directe suffit et évite un second calcul bcrypt)
+    if compare_digest(password_data.new_password.encode(), password_data.old_password.encode()):
         # Log failed attempt
-        log = Log(
+        await log_sink.record(
+            db,
             user_id=db_user.id,
             action="change_password_failed",
-            description="Le nouveau mot de passe est identique à l'ancien"
+            details={"reason": "same_password"}
         )
-        db.add(log)
-        db.commit()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Le nouveau mot de passe doit être différent de l'ancien"
         )
     
     # Mettre à jour le mot de passe
-    db_user.password = pwd_context.hash(password_data.new_password)
+    db_user.password = await password_hasher.ahash(password_data.new_password)
     
     # Log successful password change
-    log = Log(
+    await log_sink.record(
+        db,
         user_id=db_user.id,
         action="change_password_success",
-        description="Mot de passe mis à jour avec succès"
+        commit=False,
+        transactional=True
     )
-    db.add(log)
-    db.commit()
+    await db.commit()
+    await token_revocation.revoke_user(db_user.id)
+    response.delete_cookie(key="access_token", httponly=True, secure=False, samesite="lax")
     
     return {"message": "Mot de passe mis à jour avec succès"}
\ No newline at end of file
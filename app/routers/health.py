@@ -0,0 +1,23 @@
+import asyncio
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from app.database import check_connection
+from app.config import DB_READY_TIMEOUT
+
+router = APIRouter(tags=["Health"])
+
+# Vivacité : le processus répond (aucune dépendance externe)
+@router.get("/healthz", include_in_schema=False)
+async def healthz():
+    return {"status": "ok"}
+
+# Disponibilité : démarrage terminé et base joignable
+@router.get("/readyz", include_in_schema=False)
+async def readyz(request: Request):
+    if not getattr(request.app.state, "started", False):
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    try:
+        await asyncio.wait_for(check_connection(), DB_READY_TIMEOUT)
+    except Exception as e:
+        return JSONResponse(status_code=503, content={"status": "unavailable", "database": str(e)[:200]})
+    return {"status": "ready"}
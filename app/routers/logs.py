@@ -1,50 +1,271 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.database import get_db
-from app.models.users.user import User
+from fastapi import APIRouter, Depends, Query, Header, Request
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_, select, false
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
+from typing import Optional, Literal, List
+from itertools import islice
+import asyncio
+import csv
+import io
+import zlib
+import orjson
+from app.database import get_read_db, AsyncSessionLocal
 from app.models.log import Log
 from app.schemas.log import LogResponse, LogSummaryResponse
 from app.models.enum.enums import Role
-from app.utils.jwt import get_current_user
+from app.utils.principal import Principal, require_role
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.log_rollup import get_action_counts
+from app.utils.retention import iter_archived_logs
+from app.utils.event_broker import event_broker, log_event
+from app.utils.serialization import fast_json
+from app.utils.log_messages import log_row
+from app.utils.conditional import conditional_response
+from app.models.log import LOG_ACTION_CODES
+from app.config import SSE_HEARTBEAT_SECONDS, SSE_REPLAY_LIMIT
 
 router = APIRouter(prefix="/logs", tags=["Logs"])
 
+# Taille de page maximale acceptée pour /logs
+MAX_PAGE_SIZE = 500
+
+# Nombre de lignes lues par aller-retour du curseur serveur lors d'un export
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = ("id", "user_id", "action", "description", "created_at")
+
+# Colonnes lues pour LogResponse (la description est rendue à partir de details) :
+# les listes lisent des tuples, jamais d'entités Log complètes
+LOG_COLUMNS = (Log.id, Log.user_id, Log.action, Log.details, Log.created_at)
+
+def _naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """
+    Date reçue en paramètre ramenée en UTC sans fuseau, comme les dates stockées (ex. "...Z" ou "+02:00")
+    """
+    if moment is not None and moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def apply_log_filters(query, action: Optional[str], user_id: Optional[int], since: Optional[datetime], until: Optional[datetime]):
+    """
+    Applique les filtres communs (action, utilisateur, intervalle de temps) à une requête sur Log
+    """
+    if action:
+        # Action inconnue : aucun log ne peut correspondre (et elle n'a pas de code à comparer)
+        query = query.filter(Log.action == action if action in LOG_ACTION_CODES else false())
+    if user_id is not None:
+        query = query.filter(Log.user_id == user_id)
+    if since:
+        query = query.filter(Log.created_at >= _naive_utc(since))
+    if until:
+        query = query.filter(Log.created_at < _naive_utc(until))
+    return query
+
 @router.get("/", response_model=LogSummaryResponse)
-def get_logs(db: Session = Depends(get_db), user_id: str = Depends(get_current_user)):
+async def get_logs(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Curseur opaque renvoyé par la page précédente"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    action: Optional[str] = Query(None),
+    user_id: Optional[int] = Query(None),
+    since: Optional[datetime] = Query(None, description="Début de l'intervalle (inclus)"),
+    until: Optional[datetime] = Query(None, description="Fin de l'intervalle (exclue)"),
+    counts_since: Optional[datetime] = Query(None, description="Début de la fenêtre des compteurs (arrondi à l'heure)"),
+    counts_until: Optional[datetime] = Query(None, description="Fin de la fenêtre des compteurs (arrondie à l'heure supérieure)"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(require_role(Role.ADMIN))
+):
+    """
+    Réponse avec ETag : If-None-Match renvoie 304 tant qu'aucun log n'a été écrit
+    """
+    async def render():
+        # Page de logs, du plus récent au plus ancien, par curseur (created_at, id)
+        query = apply_log_filters(select(*LOG_COLUMNS), action, user_id, since, until)
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                Log.created_at < cursor_created_at,
+                and_(Log.created_at == cursor_created_at, Log.id < cursor_id)
+            ))
+        # On lit un élément de plus pour savoir s'il existe une page suivante
+        rows = await db.execute(query.order_by(Log.created_at.desc(), Log.id.desc()).limit(limit + 1))
+        logs = [log_row(*row) for row in rows]
+        next_cursor = None
+        if len(logs) > limit:
+            logs = logs[:limit]
+            next_cursor = encode_cursor(logs[-1]["created_at"], logs[-1]["id"])
+
+        # Count specific actions (compteurs agrégés par heure, sans parcourir la table logs)
+        count_dict = await get_action_counts(db, _naive_utc(counts_since), _naive_utc(counts_until))
+
+        # Extract counts for specific actions
+        login_success_count = count_dict.get("login_success", 0)
+        login_failed_count = count_dict.get("login_failed", 0)
+        update_profile_success_count = count_dict.get("update_profile_success", 0)
+        update_profile_failed_count = count_dict.get("update_profile_failed", 0)
+        change_password_success_count = count_dict.get("change_password_success", 0)
+        change_password_failed_count = count_dict.get("change_password_failed", 0)
+        fraud_alert_count = count_dict.get("fraud_alert", 0)
+
+        # Return logs and counts
+        return fast_json({
+            "logs": logs,
+            "login_success_count": login_success_count,
+            "login_failed_count": login_failed_count,
+            "update_profile_success_count": update_profile_success_count,
+            "update_profile_failed_count": update_profile_failed_count,
+            "change_password_success_count": change_password_success_count,
+            "change_password_failed_count": change_password_failed_count,
+            "fraud_alert_count": fraud_alert_count,
+            "next_cursor": next_cursor
+        })
+
+    return await conditional_response(request, "logs", render, db)
+
+
+async def _iter_export_rows(action, user_id, since, until):
+    """
+    Lit les logs avec un curseur côté serveur, par lots de EXPORT_BATCH_SIZE lignes.
+    La session est ouverte ici (et non via get_read_db) car elle doit vivre pendant tout le streaming ;
+    l'export est servi par la réplique quand elle est disponible.
+    """
+    async with AsyncSessionLocal(info={"read_only": True}) as db:
+        query = select(*LOG_COLUMNS).order_by(Log.id)
+        query = apply_log_filters(query, action, user_id, since, until)
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for partition in result.partitions():
+            yield partition
+
+async def _encode_ndjson(partitions):
+    async for rows in partitions:
+        yield b"".join(orjson.dumps(log_row(*row), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+async def _encode_csv(partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    # L'en-tête part immédiatement pour que le premier octet arrive sans attendre la base
+    yield buffer.getvalue().encode("utf-8")
+    async for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        entries = (log_row(*row) for row in rows)
+        writer.writerows(
+            (entry["id"], entry["user_id"], entry["action"], entry["description"], entry["created_at"].isoformat())
+            for entry in entries
+        )
+        yield buffer.getvalue().encode("utf-8")
+
+async def _gzip(chunks):
+    # wbits=31 : en-tête et pied de page gzip, compression incrémentale à mémoire constante
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+@router.get("/export")
+async def export_logs(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    gzip: bool = Query(False),
+    action: Optional[str] = Query(None),
+    user_id: Optional[int] = Query(None),
+    since: Optional[datetime] = Query(None, description="Début de l'intervalle (inclus)"),
+    until: Optional[datetime] = Query(None, description="Fin de l'intervalle (exclue)"),
+    current_user: Principal = Depends(require_role(Role.ADMIN))
+):
+    """
+    Exporte l'intégralité (filtrée) de la table logs en NDJSON ou CSV, en streaming
+    """
+    partitions = _iter_export_rows(action, user_id, since, until)
+    if format == "csv":
+        body, media_type, extension = _encode_csv(partitions), "text/csv; charset=utf-8", "csv"
+    else:
+        body, media_type, extension = _encode_ndjson(partitions), "application/x-ndjson", "ndjson"
+
+    filename = f"logs-{datetime.utcnow():%Y%m%d%H%M%S}.{extension}"
+    if gzip:
+        # Fichier .gz téléchargé tel quel (pas de Content-Encoding, que le client décompresserait)
+        body, media_type, filename = _gzip(body), "application/gzip", filename + ".gz"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+@router.get("/archive", response_model=List[LogResponse])
+async def get_archived_logs(
+    since: datetime = Query(..., description="Début de l'intervalle (inclus)"),
+    until: Optional[datetime] = Query(None, description="Fin de l'intervalle (exclue), maintenant par défaut"),
+    action: Optional[str] = Query(None),
+    user_id: Optional[int] = Query(None),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    current_user: Principal = Depends(require_role(Role.ADMIN))
+):
+    """
+    Recherche dans les logs archivés (purgés de la base) pour les besoins d'une investigation
+    """
+    since = _naive_utc(since)
+    until = _naive_utc(until) or datetime.utcnow()
+    # Lecture et décompression des fichiers hors de la boucle d'événements
+    return await run_in_threadpool(lambda: list(islice(iter_archived_logs(since, until, action, user_id), limit)))
+
+
+def _sse(item: dict) -> str:
+    return f"id: {item['id']}\nevent: log\ndata: {item['data']}\n\n"
+
+async def _replay_events(last_id: int, action, user_id):
+    """
+    Événements manqués depuis Last-Event-ID, relus dans la table logs
+    """
+    async with AsyncSessionLocal() as db:
+        query = select(*LOG_COLUMNS).filter(Log.id > last_id)
+        query = apply_log_filters(query, action, user_id, None, None).order_by(Log.id).limit(SSE_REPLAY_LIMIT)
+        rows = (await db.execute(query)).all()
+    return [log_event(row.id, row.user_id, row.action, row.details, row.created_at) for row in rows]
+
+@router.get("/stream")
+async def stream_logs(
+    request: Request,
+    action: Optional[str] = Query(None),
+    user_id: Optional[int] = Query(None),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: Principal = Depends(require_role(Role.ADMIN))
+):
+    """
+    Flux Server-Sent Events des nouveaux logs, filtrable par action et par utilisateur
+    """
+    # Abonnement avant la relecture, pour ne rien perdre entre les deux
+    subscription = event_broker.subscribe(action, user_id)
     try:
-        user_id_int = int(user_id)
+        last_id = int(last_event_id) if last_event_id else None
     except ValueError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
-
-    current_user = db.query(User).filter(User.id == user_id_int).first()
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur non trouvé")
-    if current_user.role != Role.ADMIN:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Réservé aux administrateurs")
-
-    # Get all logs
-    logs = db.query(Log).all()
-
-    # Count specific actions
-    counts = db.query(Log.action, func.count(Log.id)).group_by(Log.action).all()
-    count_dict = {action: count for action, count in counts}
-
-    # Extract counts for specific actions
-    login_success_count = count_dict.get("login_success", 0)
-    login_failed_count = count_dict.get("login_failed", 0)
-    update_profile_success_count = count_dict.get("update_profile_success", 0)
-    update_profile_failed_count = count_dict.get("update_profile_failed", 0)
-    change_password_success_count = count_dict.get("change_password_success", 0)
-    change_password_failed_count = count_dict.get("change_password_failed", 0)
-
-    # Return logs and counts
-    return {
-        "logs": logs,
-        "login_success_count": login_success_count,
-        "login_failed_count": login_failed_count,
-        "update_profile_success_count": update_profile_success_count,
-        "update_profile_failed_count": update_profile_failed_count,
-        "change_password_success_count": change_password_success_count,
-        "change_password_failed_count": change_password_failed_count
-    }
\ No newline at end of file
+        last_id = None
+
+    async def events():
+        nonlocal last_id
+        try:
+            yield "retry: 1000\n\n"
+            if last_id is not None:
+                for item in await _replay_events(last_id, action, user_id):
+                    last_id = item["id"]
+                    yield _sse(item)
+            while not await request.is_disconnected():
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    # Abonné évincé car trop lent : le client se reconnecte avec Last-Event-ID
+                    break
+                if last_id is not None and item["id"] <= last_id:
+                    continue
+                yield _sse(item)
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,54 @@
+from secrets import compare_digest
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from app.config import METRICS_TOKEN
+from app.utils.metrics import HISTOGRAMS, COUNTERS, render_gauges
+from app.utils.log_sink import log_sink
+from app.utils.hashing import password_hasher
+from app.utils.pool_metrics import get_pool_metrics
+from app.utils.jwt import token_cache
+from app.utils.revocation import token_revocation
+from app.utils.principal import principal_cache
+from app.database import replica_health
+
+router = APIRouter(tags=["Monitoring"])
+
+def _component_gauges() -> list[str]:
+    """
+    État instantané des composants déjà suivis dans /monitoring
+    """
+    lines = []
+    lines += render_gauges("audit_log_sink", "Journal d'audit : file, lots, écritures", log_sink.stats(), "stat")
+    hasher = password_hasher.stats()
+    lines += render_gauges("password_hasher", "Pool de hachage : opérations en cours, rejets", hasher, "stat")
+    lines += ["# HELP password_hasher_seconds_total Temps cumulé par opération de hachage",
+              "# TYPE password_hasher_seconds_total counter"]
+    for name, op in sorted(hasher["operations"].items()):
+        lines.append(f'password_hasher_seconds_total{{operation="{name}"}} {op["seconds"]}')
+    lines += ["# HELP db_pool Pools de connexions : emprunts, attente, débordements", "# TYPE db_pool gauge"]
+    for pool, stats in sorted(get_pool_metrics().items()):
+        for key, value in sorted(stats.items()):
+            if isinstance(value, (int, float)):
+                lines.append(f'db_pool{{pool="{pool}",stat="{key}"}} {value}')
+    lines += render_gauges("jwt_cache", "Cache des JWT vérifiés", token_cache.stats(), "stat")
+    lines += render_gauges("token_revocation", "Révocation des tokens : entrées actives, rejets", token_revocation.stats(), "stat")
+    lines += render_gauges("principal_cache", "Cache des utilisateurs authentifiés", principal_cache.stats(), "stat")
+    replica = replica_health.stats()
+    if replica["configured"]:
+        replica["healthy"] = int(replica["healthy"])
+        lines += render_gauges("db_replica", "Réplique en lecture : santé, retard, lectures renvoyées au primaire", replica, "stat")
+    return lines
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """
+    Métriques au format texte Prometheus
+    """
+    if METRICS_TOKEN and not compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Jeton de métriques invalide")
+    lines = []
+    for metric in (*HISTOGRAMS, *COUNTERS):
+        lines += metric.render()
+    lines += _component_gauges()
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
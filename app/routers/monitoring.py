@@ -0,0 +1,107 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, replica_health
+from app.models.enum.enums import Role
+from app.utils.principal import Principal, require_role, principal_cache
+from app.utils.log_sink import log_sink
+from app.utils.hashing import password_hasher
+from app.utils.pool_metrics import get_pool_metrics
+from app.utils.jwt import token_cache
+from app.utils.revocation import token_revocation
+from app.utils.login_guard import login_guard
+from app.utils.event_broker import event_broker
+from app.utils.metrics import recent_slow_queries
+from app.utils.user_directory import user_count_cache
+from app.utils.conditional import cache_stats
+from app.utils.profiling import profile_store
+from app.utils.email_dispatcher import email_dispatcher, get_outbox_summary
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+
+# Métriques du journal d'audit (file, lots, contre-pression)
+@router.get("/log-sink")
+async def get_log_sink_stats(current_user: Principal = Depends(require_role(Role.ADMIN))):
+    return log_sink.stats()
+
+# Métriques du pool de hachage des mots de passe (durées par opération, rejets)
+@router.get("/password-hasher")
+async def get_password_hasher_stats(current_user: Principal = Depends(require_role(Role.ADMIN))):
+    return password_hasher.stats()
+
+# Métriques des pools de connexions (attente d'emprunt, connexions empruntées, débordements)
+@router.get("/db-pool")
+async def get_db_pool_stats(current_user: Principal = Depends(require_role(Role.ADMIN))):
+    return get_pool_metrics()
+
+# Efficacité du cache des utilisateurs authentifiés
+@router.get("/principal-cache")
+async def get_principal_cache_stats(current_user: Principal = Depends(require_role(Role.ADMIN))):
+    return principal_cache.stats()
+
+# Efficacité du cache des JWT vérifiés
+@router.get("/jwt-cache")
+async def get_jwt_cache_stats(current_user: Principal = Depends(require_role(Role.ADMIN))):
+    return token_cache.stats()
+
+# État de livraison des emails (outbox) et du dispatcher
+@router.get("/email-outbox")
+async def get_email_outbox_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_role(Role.ADMIN))
+):
+    summary = await get_outbox_summary(db)
+    summary["dispatcher"] = email_dispatcher.stats()
+    return summary
+
+# Protection contre le brute force (connexions refusées, verrouillages)
+@router.get("/login-guard")
+async def get_login_guard_stats(current_user: Principal = Depends(require_role(Role.ADMIN))):
+    return login_guard.stats()
+
+# Abonnés au flux SSE des logs
+@router.get("/event-stream")
+async def get_event_stream_stats(current_user: Principal = Depends(require_role(Role.ADMIN))):
+    return event_broker.stats()
+
+# Dernières requêtes SQL lentes (au-delà de SLOW_QUERY_MS) et route qui les a émises
+@router.get("/slow-queries")
+async def get_slow_queries(current_user: Principal = Depends(require_role(Role.ADMIN))):
+    return list(reversed(recent_slow_queries))
+
+# Efficacité du cache des totaux de l'annuaire
+@router.get("/user-count-cache")
+async def get_user_count_cache_stats(current_user: Principal = Depends(require_role(Role.ADMIN))):
+    return user_count_cache.stats()
+
+# Requêtes conditionnelles : réponses 304 et cache des corps sérialisés
+@router.get("/etag-cache")
+async def get_etag_cache_stats(current_user: Principal = Depends(require_role(Role.ADMIN))):
+    return cache_stats()
+
+# Réplique en lecture : santé, retard mesuré et lectures renvoyées sur le primaire
+@router.get("/replica")
+async def get_replica_stats(current_user: Principal = Depends(require_role(Role.ADMIN))):
+    return replica_health.stats()
+
+# Révocation des tokens : tokens et utilisateurs révoqués, requêtes rejetées
+@router.get("/token-revocation")
+async def get_token_revocation_stats(current_user: Principal = Depends(require_role(Role.ADMIN))):
+    return token_revocation.stats()
+
+# Profils de requêtes enregistrés (X-Profile: 1 ou échantillonnage), du plus récent au plus ancien
+@router.get("/profiles")
+async def list_profiles(current_user: Principal = Depends(require_role(Role.ADMIN))):
+    return await run_in_threadpool(profile_store.list)
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str, current_user: Principal = Depends(require_role(Role.ADMIN))):
+    artifact = profile_store.artifact(name)
+    if artifact is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profil introuvable")
+    path, format = artifact
+    if format == "html":
+        return FileResponse(path, media_type="text/html")
+    return FileResponse(path, media_type="application/octet-stream", filename=os.path.basename(path))
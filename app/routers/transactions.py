@@ -0,0 +1,78 @@
+import time
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models.transaction import Transaction
+from app.models.enum.enums import Role
+from app.schemas.transaction import TransactionBatch, TransactionBatchResponse, FraudAlert
+from app.utils.principal import Principal, require_role
+from app.utils.fraud_rules import fraud_rules, rule_labels, TransactionColumns
+from app.utils.log_sink import log_sink
+from app.config import TRANSACTION_BATCH_MAX_ROWS
+
+router = APIRouter(prefix="/transactions", tags=["Transactions"])
+
+# Ingestion d'un lot de transactions (admin uniquement) : notation, insertion, alertes
+@router.post("/batch", response_model=TransactionBatchResponse)
+async def ingest_transactions(
+    batch: TransactionBatch,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_role(Role.ADMIN))
+):
+    """
+    Note le lot avec le moteur de règles, l'enregistre en insertions multi-lignes et journalise
+    une alerte fraud_alert par transaction suspecte, dans la même transaction.
+    Un lot rejoué est sans effet : les external_id déjà reçus sont ignorés.
+    """
+    if len(batch.transactions) > TRANSACTION_BATCH_MAX_ROWS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Maximum {TRANSACTION_BATCH_MAX_ROWS} transactions par lot")
+
+    # Doublons dans le lot : première occurrence gardée ; déjà en base : une seule requête IN
+    unique = {}
+    for row in batch.transactions:
+        unique.setdefault(row.external_id, row)
+    existing = set((await db.scalars(select(Transaction.external_id).filter(Transaction.external_id.in_(list(unique))))).all())
+    rows = [row for external_id, row in unique.items() if external_id not in existing]
+
+    started = time.perf_counter()
+    columns = TransactionColumns.from_rows(rows)
+    scores, rules = fraud_rules.evaluate(columns)
+    flagged = fraud_rules.alerts(scores)
+    scoring_seconds = time.perf_counter() - started
+
+    alerts = []
+    if rows:
+        values = []
+        for row, score, bits, is_fraud in zip(rows, scores.tolist(), rules.tolist(), flagged.tolist()):
+            values.append({**row.model_dump(), "fraud_score": score, "triggered_rules": bits,
+                           "is_fraud": is_fraud, "ingested_by": current_user.id})
+            if is_fraud:
+                alerts.append(FraudAlert(external_id=row.external_id, score=score, rules=rule_labels(bits)))
+        try:
+            await db.execute(insert(Transaction), values)
+        except IntegrityError:
+            # Même external_id inséré entre-temps par un lot concurrent
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Transactions déjà en cours d'ingestion, renvoyer le lot")
+        # Alertes dans la même transaction que les transactions, quel que soit le mode du journal :
+        # pas d'alerte pour une transaction dont l'insertion n'est finalement pas validée
+        for alert in alerts:
+            await log_sink.record(
+                db,
+                user_id=None,
+                action="fraud_alert",
+                details={"transaction": alert.external_id, "score": alert.score, "rules": ", ".join(alert.rules)},
+                commit=False,
+                transactional=True
+            )
+        await db.commit()
+
+    return TransactionBatchResponse(
+        received=len(batch.transactions),
+        inserted=len(rows),
+        duplicates=len(batch.transactions) - len(rows),
+        alerts=alerts,
+        scoring_ms=round(scoring_seconds * 1000, 3)
+    )
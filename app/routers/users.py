@@ -1,76 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from pydantic import ValidationError
+from sqlalchemy import func, select, insert, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, get_read_db
 from app.models.users.user import User
 from app.models.users.ResetToken import ResetToken
-from app.schemas.user import UserResponse, UserUpdate, UserAdminCreate, ResetPassword
-from app.utils.jwt import get_current_user
-from app.utils.email  import send_reset_password_email
-from app.models.enum.enums import Role
-from passlib.context import CryptContext
-from typing import List
+from app.models.email_outbox import EmailOutbox
+from app.schemas.user import UserResponse, UserUpdate, UserAdminCreate, ResetPassword, BulkUserRowResult, BulkUserImportResponse
+from app.utils.principal import Principal, get_current_principal, require_role, invalidate_principal
+from app.utils.email import enqueue_reset_password_email, reset_password_outbox_row
+from app.utils.email_dispatcher import email_dispatcher
+from app.models.enum.enums import Role, AnalystDepartment
+from app.utils.hashing import password_hasher
+from app.utils.serialization import rows_as_dicts, fast_json
+from app.utils.pagination import encode_id_cursor, decode_id_cursor
+from app.utils.user_directory import apply_user_filters, count_users, invalidate_user_counts
+from app.utils.conditional import conditional_response, pin_recent_writes, resource_versions
+from app.utils.revocation import token_revocation
+from typing import List, Optional
 from secrets import token_urlsafe
 from datetime import datetime, timedelta
+from app.config import BULK_IMPORT_MAX_ROWS, USER_PAGE_SIZE, USER_MAX_PAGE_SIZE
+import csv
+import io
+import json
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-# Configuration pour le hachage des mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Colonnes de UserResponse (sans le hash du mot de passe ni les relations)
+USER_COLUMNS = (User.id, User.email, User.firstName, User.lastName, User.phoneNumber, User.department, User.role)
 
-# Récupérer tous les utilisateurs (admin uniquement)
-@router.get("/", response_model=List[UserResponse])
-def get_all_users(db: Session = Depends(get_db), user_id: str = Depends(get_current_user)):
+def _parse_bulk_rows(content_type: str, body: bytes) -> list:
+    """
+    Lit le corps d'un import groupé : CSV (en-tête = noms des champs) ou tableau JSON
+    """
     try:
-        user_id_int = int(user_id)
-    except ValueError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
-    
-    current_user = db.query(User).filter(User.id == user_id_int).first()
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur non trouvé")
-    if current_user.role != Role.ADMIN:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Réservé aux administrateurs")
-    
-    users = db.query(User).all()
-    return users
+        text = body.decode("utf-8-sig")
+        if "csv" in content_type:
+            rows = []
+            for record in csv.DictReader(io.StringIO(text)):
+                # Cellules vides : champ absent (valeur par défaut du schéma)
+                rows.append({key.strip(): value.strip() for key, value in record.items() if key and value and value.strip()})
+            return rows
+        rows = json.loads(text)
+    except (UnicodeDecodeError, ValueError, csv.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Corps de requête illisible")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Un tableau d'utilisateurs est attendu")
+    return rows
+
+# Annuaire des utilisateurs (admin uniquement) : filtres, pagination par curseur sur l'id
+@router.get("/", response_model=List[UserResponse])
+async def get_all_users(
+    request: Request,
+    department: Optional[AnalystDepartment] = Query(None),
+    role: Optional[Role] = Query(None),
+    q: Optional[str] = Query(None, min_length=1, max_length=100, description="Préfixe de l'email, du prénom ou du nom"),
+    cursor: Optional[str] = Query(None, description="Curseur opaque renvoyé dans X-Next-Cursor"),
+    limit: int = Query(USER_PAGE_SIZE, ge=1, le=USER_MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(require_role(Role.ADMIN))
+):
+    """
+    Le corps reste une liste d'utilisateurs ; la page suivante et le total filtré
+    sont renvoyés dans les en-têtes X-Next-Cursor et X-Total-Count.
+    Réponse avec ETag : If-None-Match renvoie 304 tant qu'aucun utilisateur n'a été modifié.
+    """
+    async def render():
+        query = apply_user_filters(select(*USER_COLUMNS), department, role, q)
+        if cursor:
+            query = query.filter(User.id > decode_id_cursor(cursor))
+        # Un élément de plus pour savoir s'il existe une page suivante
+        users = rows_as_dicts(await db.execute(query.order_by(User.id).limit(limit + 1)))
+        headers = {"X-Total-Count": str(await count_users(db, department, role, q))}
+        if len(users) > limit:
+            users = users[:limit]
+            headers["X-Next-Cursor"] = encode_id_cursor(users[-1]["id"])
+        return fast_json(users, headers=headers)
+
+    return await conditional_response(request, "users", render, db)
 
 # Récupérer un utilisateur par ID
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db), current_user_id: str = Depends(get_current_user)):
-    try:
-        current_user_id_int = int(current_user_id)
-    except ValueError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
-    
-    current_user = db.query(User).filter(User.id == current_user_id_int).first()
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur connecté non trouvé")
-    
+async def get_user(user_id: int, db: AsyncSession = Depends(get_read_db), current_user: Principal = Depends(get_current_principal)):
     # Les utilisateurs peuvent voir leurs propres données, les admins peuvent voir tout
-    if current_user.role != Role.ADMIN and str(current_user.id) != str(user_id):
+    if current_user.role != Role.ADMIN and current_user.id != user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Non autorisé à accéder à cet utilisateur")
     
-    user = db.query(User).filter(User.id == user_id).first()
+    pin_recent_writes(db, "users")
+    user = await db.scalar(select(User).filter(User.id == user_id))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur non trouvé")
     return user
 
 # Créer un utilisateur (admin uniquement, sans mot de passe)
 @router.post("/", response_model=UserResponse)
-def create_user(user: UserAdminCreate, db: Session = Depends(get_db), current_user_id: str = Depends(get_current_user)):
-    try:
-        current_user_id_int = int(current_user_id)
-    except ValueError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
-    
-    current_user = db.query(User).filter(User.id == current_user_id_int).first()
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur connecté non trouvé")
-    if current_user.role != Role.ADMIN:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Réservé aux administrateurs")
-    
+async def create_user(user: UserAdminCreate, db: AsyncSession = Depends(get_async_db), current_user: Principal = Depends(require_role(Role.ADMIN))):
     # Vérifier si l'email existe déjà
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).filter(User.email == user.email))
     if db_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email déjà enregistré")
     
@@ -86,8 +113,7 @@ def create_user(user: UserAdminCreate, db: Session = Depends(get_db), current_us
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.flush()  # Obtenir l'id du nouvel utilisateur
     
     # Générer un token de réinitialisation
     token = token_urlsafe(32)
@@ -100,24 +126,84 @@ def create_user(user: UserAdminCreate, db: Session = Depends(get_db), current_us
     )
     
     db.add(reset_token)
-    db.commit()
     
-    # Envoyer l'email de réinitialisation
-    try:
-        send_reset_password_email(new_user.email, token)
-    except Exception as e:
-        db.delete(new_user)  # Annuler la création si l'email échoue
-        db.delete(reset_token)
-        db.commit()
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erreur lors de l'envoi de l'email : {str(e)}")
+    # L'email d'invitation est mis dans l'outbox, dans la même transaction,
+    # puis envoyé en arrière-plan : un incident SMTP ne peut plus annuler la création
+    enqueue_reset_password_email(db, new_user.email, token)
+    await db.commit()
+    email_dispatcher.wake()
     
     return new_user
 
+# Importer des utilisateurs en masse (admin uniquement), depuis un tableau JSON ou un CSV
+@router.post("/bulk", response_model=BulkUserImportResponse)
+async def bulk_create_users(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_role(Role.ADMIN))
+):
+    """
+    Crée les utilisateurs valides en quelques requêtes ensemblistes et renvoie un rapport par ligne.
+    Corps : tableau JSON d'objets UserAdminCreate, ou CSV (Content-Type: text/csv) avec les mêmes colonnes.
+    """
+    raw_rows = _parse_bulk_rows(request.headers.get("content-type", ""), await request.body())
+    if len(raw_rows) > BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Maximum {BULK_IMPORT_MAX_ROWS} lignes par import")
+
+    results = []
+    candidates = {}  # email en minuscules -> (résultat, données validées)
+    for index, raw in enumerate(raw_rows, start=1):
+        try:
+            row = UserAdminCreate.model_validate(raw)
+        except ValidationError as e:
+            email = raw.get("email") if isinstance(raw, dict) else None
+            errors = [f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()]
+            results.append(BulkUserRowResult(row=index, email=email, status="invalid", errors=errors))
+            continue
+        result = BulkUserRowResult(row=index, email=row.email, status="created")
+        # Comparaison insensible à la casse, comme l'index unique MySQL
+        if row.email.lower() in candidates:
+            result.status = "duplicate"
+        else:
+            candidates[row.email.lower()] = (result, row)
+        results.append(result)
+
+    # Emails déjà enregistrés : une seule requête IN, insensible à la casse des deux côtés
+    if candidates:
+        existing = (await db.scalars(select(User.email).filter(func.lower(User.email).in_(list(candidates))))).all()
+        for email in existing:
+            result, _ = candidates.pop(email.lower())
+            result.status = "exists"
+
+    if candidates:
+        rows = [row for _, row in candidates.values()]
+        emails = [row.email for row in rows]
+        # Insertions multi-lignes : utilisateurs, puis leurs tokens et leurs emails d'invitation
+        await db.execute(insert(User), [{**row.model_dump(), "password": None} for row in rows])
+        ids = dict((await db.execute(select(User.email, User.id).filter(User.email.in_(emails)))).all())
+        expires_at = datetime.utcnow() + timedelta(hours=1)
+        tokens = {email: token_urlsafe(32) for email in emails}
+        await db.execute(insert(ResetToken), [
+            {"user_id": ids[email], "token": tokens[email], "expires_at": expires_at, "used": False}
+            for email in emails
+        ])
+        await db.execute(insert(EmailOutbox), [reset_password_outbox_row(email, tokens[email]) for email in emails])
+        await db.commit()
+        # Insertions Core : hors du suivi ORM des écritures sur users
+        invalidate_user_counts()
+        resource_versions.bump("users")
+        email_dispatcher.wake()
+        for result, row in candidates.values():
+            result.user_id = ids[row.email]
+
+    created = len(candidates)
+    return BulkUserImportResponse(created=created, skipped=len(results) - created, results=results)
+
 # Réinitialiser le mot de passe
 @router.post("/reset-password")
-def reset_password(data: ResetPassword, db: Session = Depends(get_db)):
+async def reset_password(data: ResetPassword, db: AsyncSession = Depends(get_async_db)):
     # Vérifier le token
-    reset_token = db.query(ResetToken).filter(ResetToken.token == data.token).first()
+    reset_token = await db.scalar(select(ResetToken).filter(ResetToken.token == data.token))
     if not reset_token:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token invalide")
     
@@ -128,35 +214,28 @@ def reset_password(data: ResetPassword, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token expiré")
     
     # Récupérer l'utilisateur
-    user = db.query(User).filter(User.id == reset_token.user_id).first()
+    user = await db.scalar(select(User).filter(User.id == reset_token.user_id))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur non trouvé")
     
     # Mettre à jour le mot de passe
-    user.password = pwd_context.hash(data.new_password)
+    user.password = await password_hasher.ahash(data.new_password)
     reset_token.used = True
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    # Les sessions ouvertes avec l'ancien mot de passe ne doivent pas survivre à sa réinitialisation
+    await token_revocation.revoke_user(user.id)
     return {"message": "Mot de passe défini avec succès"}
 
 # Mettre à jour un utilisateur
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db), current_user_id: str = Depends(get_current_user)):
-    try:
-        current_user_id_int = int(current_user_id)
-    except ValueError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
-    
-    current_user = db.query(User).filter(User.id == current_user_id_int).first()
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur connecté non trouvé")
-    
+async def update_user(user_id: int, user_update: UserUpdate, db: AsyncSession = Depends(get_async_db), current_user: Principal = Depends(get_current_principal)):
     # Les utilisateurs peuvent mettre à jour leurs propres données, les admins peuvent tout mettre à jour
-    if current_user.role != Role.ADMIN and str(current_user.id) != str(user_id):
+    if current_user.role != Role.ADMIN and current_user.id != user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Non autorisé à modifier cet utilisateur")
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).filter(User.id == user_id))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur non trouvé")
     
@@ -165,28 +244,23 @@ def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get
     for key, value in update_data.items():
         setattr(user, key, value)
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    invalidate_principal(user.id)
     return user
 
 # Supprimer un utilisateur (admin uniquement)
 @router.delete("/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_db), current_user_id: str = Depends(get_db)):
-    try:
-        current_user_id_int = int(current_user_id)
-    except ValueError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
-    
-    current_user = db.query(User).filter(User.id == current_user_id_int).first()
-    if not current_user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur connecté non trouvé")
-    if current_user.role != Role.ADMIN:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Réservé aux administrateurs")
-    
-    user = db.query(User).filter(User.id == user_id).first()
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db), current_user: Principal = Depends(require_role(Role.ADMIN))):
+    user = await db.scalar(select(User).filter(User.id == user_id))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur non trouvé")
     
-    db.delete(user)
-    db.commit()
+    # Jetons de réinitialisation d'abord (user_id non nullable) : tout utilisateur invité en a un
+    await db.execute(delete(ResetToken).where(ResetToken.user_id == user_id))
+    await db.delete(user)
+    await db.commit()
+    # Après validation seulement : un échec de suppression laisse les sessions intactes
+    invalidate_principal(user_id)
+    await token_revocation.revoke_user(user_id)
     return {"message": "Utilisateur supprimé avec succès"}
\ No newline at end of file
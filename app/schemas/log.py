@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 class LogResponse(BaseModel):
     id: int
@@ -20,4 +20,6 @@ class LogSummaryResponse(BaseModel):
     update_profile_success_count: int
     update_profile_failed_count: int
     change_password_success_count: int
-    change_password_failed_count: int
\ No newline at end of file
+    change_password_failed_count: int
+    fraud_alert_count: int = 0
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field, validator
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List
+
+class TransactionCreate(BaseModel):
+    external_id: str = Field(min_length=1, max_length=64)
+    account_id: str = Field(min_length=1, max_length=64)
+    amount: Decimal = Field(gt=0, max_digits=14, decimal_places=2)
+    currency: str = Field(min_length=3, max_length=3)
+    country: str = Field(pattern=r"^[A-Za-z]{2}$")
+    merchant: str = Field(min_length=1, max_length=100)
+    occurred_at: datetime
+
+    @validator("currency", "country")
+    def uppercase(cls, v):
+        return v.upper()
+
+    @validator("occurred_at")
+    def naive_utc(cls, v):
+        # Stockage en UTC sans fuseau, comme les autres dates de la base
+        if v.tzinfo is not None:
+            v = v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
+
+class TransactionBatch(BaseModel):
+    transactions: List[TransactionCreate]
+
+class FraudAlert(BaseModel):
+    external_id: str
+    score: int
+    rules: List[str]
+
+class TransactionBatchResponse(BaseModel):
+    received: int
+    inserted: int
+    duplicates: int  # Déjà enregistrées (même external_id) ou répétées dans le lot
+    alerts: List[FraudAlert]
+    scoring_ms: float
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, validator
-from typing import Optional
+from typing import Optional, List
 from app.models.enum.enums import Role, AnalystDepartment
 
 class UserBase(BaseModel):
@@ -66,4 +66,16 @@ class UserResponse(UserBase):
     id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BulkUserRowResult(BaseModel):
+    row: int  # Numéro de la ligne dans le fichier/tableau importé (à partir de 1)
+    email: Optional[str] = None
+    status: str  # created, exists, duplicate, invalid
+    user_id: Optional[int] = None
+    errors: Optional[List[str]] = None
+
+class BulkUserImportResponse(BaseModel):
+    created: int
+    skipped: int
+    results: List[BulkUserRowResult]
@@ -0,0 +1,29 @@
+"""
+Archive les logs plus anciens que la durée de rétention puis les supprime,
+et purge les tokens de réinitialisation utilisés ou expirés.
+
+Usage : python -m app.scripts.purge_audit_logs [--days 365] [--chunk-size 1000] [--skip-tokens]
+"""
+import argparse
+from datetime import datetime, timedelta
+from app.config import LOG_RETENTION_DAYS, LOG_ARCHIVE_DIR, RETENTION_CHUNK_SIZE, RETENTION_CHUNK_PAUSE
+from app.utils.retention import archive_and_purge_logs, purge_reset_tokens
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=LOG_RETENTION_DAYS, help="Durée de rétention des logs en jours")
+    parser.add_argument("--archive-dir", default=LOG_ARCHIVE_DIR)
+    parser.add_argument("--chunk-size", type=int, default=RETENTION_CHUNK_SIZE)
+    parser.add_argument("--pause", type=float, default=RETENTION_CHUNK_PAUSE, help="Pause entre deux lots (secondes)")
+    parser.add_argument("--skip-tokens", action="store_true", help="Ne pas purger les tokens de réinitialisation")
+    args = parser.parse_args()
+
+    cutoff = datetime.utcnow() - timedelta(days=args.days)
+    result = archive_and_purge_logs(cutoff, args.archive_dir, args.chunk_size, args.pause)
+    print(f"✅ {result['archived']} logs antérieurs au {cutoff:%Y-%m-%d %H:%M} archivés et supprimés ({len(result['files'])} fichiers).")
+    if not args.skip_tokens:
+        deleted = purge_reset_tokens(chunk_size=args.chunk_size, pause=args.pause)
+        print(f"✅ {deleted} tokens de réinitialisation supprimés.")
+
+if __name__ == "__main__":
+    main()
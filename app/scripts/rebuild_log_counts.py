@@ -0,0 +1,18 @@
+"""
+Reconstruit la table log_action_counts à partir de la table logs.
+
+Usage : python -m app.scripts.rebuild_log_counts
+"""
+from app.database import engine
+# Import des modèles liés à Log : configuration des mappers avant la première requête
+from app.models.users.user import User  # noqa: F401
+from app.models.users.ResetToken import ResetToken  # noqa: F401
+from app.utils.log_rollup import rebuild_action_counts
+
+def main():
+    with engine.begin() as connection:
+        rebuild_action_counts(connection)
+    print("✅ Compteurs de logs reconstruits.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Requêtes conditionnelles sur les listes d'administration (GET /users/, GET /logs/).
+
+Chaque ressource a un numéro de version, incrémenté à chaque écriture validée. L'ETag d'une réponse
+dérive de (chemin, paramètres, version) : un If-None-Match correspondant reçoit un 304 sans aucune
+requête en base, et un corps déjà sérialisé pour cette version est resservi depuis un cache borné en octets.
+"""
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.users.user import User
+from app.models.log import Log
+from app.config import (
+    ETAG_CACHE_BYTES,
+    ETAG_LOCAL_MAX_STALENESS,
+    RESOURCE_VERSION_REDIS_URL,
+    REPLICA_MAX_LAG_SECONDS,
+    REPLICA_CHECK_INTERVAL
+)
+
+# En-têtes de la réponse d'origine conservés avec le corps en cache
+CACHED_HEADERS = ("content-type", "x-next-cursor", "x-total-count")
+
+class ResourceVersions:
+    """
+    Compteurs de version par ressource. En mémoire, ils sont propres au worker (préfixés par un
+    identifiant de processus et renouvelés toutes les max_staleness secondes, ce qui borne le retard
+    sur les écritures faites par les autres workers). Avec Redis, ils sont partagés.
+    """
+
+    def __init__(self, redis_url=RESOURCE_VERSION_REDIS_URL, max_staleness=ETAG_LOCAL_MAX_STALENESS):
+        self.max_staleness = max_staleness
+        self._local = {}
+        self._changed_at = {}
+        self._lock = threading.Lock()
+        self._nonce = os.urandom(4).hex()
+        self._loop = None
+        self._pending = set()
+        self.redis_url = redis_url
+        self.redis = None
+        self._sync_redis = None
+        if redis_url:
+            import redis.asyncio as redis  # Dépendance optionnelle
+            self.redis = redis.from_url(redis_url)
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """
+        Boucle d'événements utilisée pour propager les incréments vers Redis (au démarrage)
+        """
+        self._loop = loop
+
+    def bump(self, resource: str):
+        """
+        Nouvelle version de la ressource ; appelable depuis la boucle ou depuis un thread d'arrière-plan
+        """
+        with self._lock:
+            self._local[resource] = self._local.get(resource, 0) + 1
+            self._changed_at[resource] = time.monotonic()
+        if self.redis is None:
+            return
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._incr_remote, resource)
+        else:
+            # Hors de l'application (scripts de maintenance) : aucune boucle, client Redis synchrone
+            if self._sync_redis is None:
+                import redis
+                self._sync_redis = redis.Redis.from_url(self.redis_url)
+            self._sync_redis.incr(f"resource_version:{resource}")
+
+    def _incr_remote(self, resource: str):
+        task = self._loop.create_task(self.redis.incr(f"resource_version:{resource}"))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def changed_within(self, resource: str, seconds: float) -> bool:
+        """
+        Vrai si ce worker a validé une écriture sur la ressource dans les dernières secondes
+        """
+        changed_at = self._changed_at.get(resource)
+        return changed_at is not None and time.monotonic() - changed_at < seconds
+
+    async def token(self, resource: str) -> str:
+        if self.redis is not None:
+            return (await self.redis.get(f"resource_version:{resource}") or b"0").decode()
+        with self._lock:
+            local = self._local.get(resource, 0)
+        epoch = int(time.time() // self.max_staleness) if self.max_staleness > 0 else 0
+        return f"{self._nonce}.{local}.{epoch}"
+
+class BodyCache:
+    """
+    Corps de réponse sérialisés, éviction LRU au-delà de max_bytes octets au total
+    """
+
+    def __init__(self, max_bytes=ETAG_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, body: bytes, headers: dict):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[0])
+            self._entries[key] = (body, headers)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self.size, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "not_modified": self.not_modified}
+
+resource_versions = ResourceVersions()
+body_cache = BodyCache()
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+
+def pin_recent_writes(db, resource: str):
+    """
+    Session de lecture ramenée sur le primaire si la ressource a changé depuis moins que le retard
+    toléré de la réplique : une lecture juste après une écriture ne doit pas voir l'état d'avant
+    """
+    if resource_versions.changed_within(resource, REPLICA_MAX_LAG_SECONDS + REPLICA_CHECK_INTERVAL):
+        db.info["force_primary"] = True
+
+async def conditional_response(request: Request, resource: str, render, db=None) -> Response:
+    """
+    Sert une liste avec ETag : 304 si le client est à jour, corps en cache pour cette version,
+    sinon render() (coroutine renvoyant la réponse complète) est appelé puis mis en cache.
+    La version est lue avant le rendu : une écriture concurrente produit au pire un ETag déjà périmé.
+    db : session de lecture utilisée par render(), à garder sur le primaire juste après une écriture
+    (sinon un corps lu sur une réplique en retard serait mis en cache sous la nouvelle version).
+    """
+    version = await resource_versions.token(resource)
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    key = (request.url.path, query, version)
+    etag = '"' + hashlib.sha1(repr(key).encode()).hexdigest()[:20] + '"'
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        body_cache.not_modified += 1
+        return Response(status_code=304, headers={"ETag": etag})
+
+    cached = body_cache.get(key)
+    if cached is not None:
+        body, headers = cached
+        return Response(body, headers={**headers, "ETag": etag})
+
+    if db is not None:
+        pin_recent_writes(db, resource)
+    response = await render()
+    if response.status_code == 200:
+        headers = {name: value for name, value in response.headers.items() if name in CACHED_HEADERS}
+        body_cache.set(key, bytes(response.body), headers)
+    response.headers["ETag"] = etag
+    return response
+
+def cache_stats() -> dict:
+    stats = body_cache.stats()
+    stats["backend"] = "redis" if resource_versions.redis is not None else "memory"
+    return stats
+
+# Écritures ORM : la version change une fois la transaction validée
+@event.listens_for(Session, "after_flush")
+def _collect_changed_resources(session, flush_context):
+    changed = session.info.setdefault("changed_resources", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            changed.add("users")
+        elif isinstance(obj, Log):
+            changed.add("logs")
+
+@event.listens_for(Session, "after_commit")
+def _bump_changed_resources(session):
+    for resource in session.info.pop("changed_resources", ()):
+        resource_versions.bump(resource)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_resources(session):
+    session.info.pop("changed_resources", None)
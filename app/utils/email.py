@@ -1,17 +1,23 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from app.config import SMTP_SERVER, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, FRONTEND_URL
+import time
+from app.config import (
+    SMTP_SERVER,
+    SMTP_PORT,
+    SMTP_USERNAME,
+    SMTP_PASSWORD,
+    FRONTEND_URL,
+    EMAIL_FROM,
+    SMTP_USE_TLS,
+    SMTP_TIMEOUT,
+    SMTP_IDLE_TIMEOUT
+)
+from app.models.email_outbox import EmailOutbox
 
-def send_reset_password_email(email: str, token: str): 
-    msg = MIMEMultipart()
-    msg["From"] = SMTP_USERNAME
-    msg["To"] = email
-    msg["Subject"] = "Réinitialisation de votre mot de passe"
+def build_reset_password_email(token: str) -> tuple[str, str]:
+    subject = "Réinitialisation de votre mot de passe"
 
     # Lien de réinitialisation
     reset_link = f"{FRONTEND_URL}/reset-password?token={token}"
-    body = f"""  
+    body = f"""
     Bonjour,
 
     Vous avez été invité à créer un mot de passe pour votre compte.
@@ -24,14 +30,78 @@ def send_reset_password_email(email: str, token: str):
     Cordialement,
     Votre équipe
     """
+    return subject, body
+
+def reset_password_outbox_row(email: str, token: str) -> dict:
+    """
+    Colonnes de l'outbox pour un email d'invitation (utilisable en insertion groupée)
+    """
+    subject, body = build_reset_password_email(token)
+    return {"recipient": email, "subject": subject, "body": body}
+
+def enqueue_reset_password_email(db, email: str, token: str) -> EmailOutbox:
+    """
+    Ajoute l'email d'invitation à l'outbox ; il part avec le commit de l'appelant
+    """
+    message = EmailOutbox(**reset_password_outbox_row(email, token))
+    db.add(message)
+    return message
+
+def build_message(recipient: str, subject: str, body: str) -> str:
+    # Imports locaux : seul le thread d'envoi en a besoin, pas le démarrage des workers
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+
+    msg = MIMEMultipart()
+    msg["From"] = EMAIL_FROM
+    msg["To"] = recipient
+    msg["Subject"] = subject
     msg.attach(MIMEText(body, "plain"))
+    return msg.as_string()
 
-    try:
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
+class SMTPConnection:
+    """
+    Connexion SMTP authentifiée conservée entre les envois (STARTTLS et login une seule fois).
+    Rouverte automatiquement si le serveur l'a fermée ou après SMTP_IDLE_TIMEOUT d'inactivité.
+    """
+
+    def __init__(self):
+        self._server = None
+        self._last_used = 0.0
+        self.connects = 0
+
+    def _open(self):
+        import smtplib
+        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        if SMTP_USE_TLS:
             server.starttls()
+        if SMTP_USERNAME and SMTP_PASSWORD:
             server.login(SMTP_USERNAME, SMTP_PASSWORD)
-            server.sendmail(SMTP_USERNAME, email, msg.as_string())
-    except Exception as e:
-        raise Exception(f"Erreur lors de l'envoi de l'email : {str(e)}")
+        self._server = server
+        self.connects += 1
+
+    def close(self):
+        import smtplib
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
 
+    def close_if_idle(self):
+        if self._server is not None and time.monotonic() - self._last_used > SMTP_IDLE_TIMEOUT:
+            self.close()
 
+    def send(self, recipient: str, message: str):
+        import smtplib
+        if self._server is None:
+            self._open()
+        try:
+            self._server.sendmail(EMAIL_FROM, recipient, message)
+        except smtplib.SMTPServerDisconnected:
+            # Connexion fermée côté serveur : une seule nouvelle tentative sur une connexion neuve
+            self._server = None
+            self._open()
+            self._server.sendmail(EMAIL_FROM, recipient, message)
+        self._last_used = time.monotonic()
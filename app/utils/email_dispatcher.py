@@ -0,0 +1,162 @@
+"""
+Expédition en arrière-plan des emails de l'outbox.
+
+Pour tester en local sans Gmail, lancer un serveur SMTP aiosmtpd :
+    python -m aiosmtpd -n -l localhost:8025
+puis démarrer l'application avec SMTP_SERVER=localhost SMTP_PORT=8025 SMTP_USE_TLS=false SMTP_PASSWORD=
+"""
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, func, or_, and_
+from app.database import SessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.models.enum.enums import EmailStatus
+from app.utils.email import SMTPConnection, build_message
+from app.config import (
+    EMAIL_BATCH_SIZE,
+    EMAIL_POLL_INTERVAL,
+    EMAIL_MAX_ATTEMPTS,
+    EMAIL_RETRY_BASE_SECONDS,
+    EMAIL_CLAIM_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+class EmailDispatcher:
+    """
+    Thread qui réserve des lots d'emails dus, les envoie sur une connexion SMTP réutilisée
+    et reprogramme les échecs avec un délai exponentiel jusqu'à EMAIL_MAX_ATTEMPTS.
+    La réservation (claim_token) permet de lancer plusieurs workers sans double envoi.
+    """
+
+    def __init__(self, batch_size=EMAIL_BATCH_SIZE, poll_interval=EMAIL_POLL_INTERVAL,
+                 max_attempts=EMAIL_MAX_ATTEMPTS, retry_base=EMAIL_RETRY_BASE_SECONDS):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self._smtp = SMTPConnection()
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {"sent": 0, "retried": 0, "failed": 0, "batches": 0, "errors": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="email-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        if not self.running:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def wake(self):
+        """
+        Déclenche un envoi immédiat (appelé après l'ajout d'un email à l'outbox)
+        """
+        self._wakeup.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["running"] = self.running
+        stats["smtp_connects"] = self._smtp.connects
+        return stats
+
+    def _bump(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                # Tant que des lots complets partent, on enchaîne sans attendre
+                while self.dispatch_once() == self.batch_size and not self._stopping.is_set():
+                    pass
+            except Exception:
+                self._bump("errors")
+                logger.exception("Erreur du dispatcher d'emails")
+            self._smtp.close_if_idle()
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+        self._smtp.close()
+
+    def _claim(self, db) -> list[EmailOutbox]:
+        now = datetime.utcnow()
+        claimable = or_(
+            and_(EmailOutbox.status == EmailStatus.PENDING, EmailOutbox.next_attempt_at <= now),
+            # Envoi interrompu (worker arrêté en cours de lot)
+            and_(EmailOutbox.status == EmailStatus.SENDING, EmailOutbox.claimed_at < now - timedelta(seconds=EMAIL_CLAIM_TIMEOUT))
+        )
+        ids = db.scalars(select(EmailOutbox.id).where(claimable).order_by(EmailOutbox.id).limit(self.batch_size)).all()
+        if not ids:
+            return []
+        token = str(uuid.uuid4())
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids), claimable)
+            .values(status=EmailStatus.SENDING, claim_token=token, claimed_at=now)
+        )
+        db.commit()
+        return db.scalars(select(EmailOutbox).where(EmailOutbox.claim_token == token)).all()
+
+    def dispatch_once(self) -> int:
+        """
+        Envoie un lot d'emails dus ; renvoie le nombre d'emails traités
+        """
+        # expire_on_commit=False : un commit par email sans recharger les suivants
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            messages = self._claim(db)
+            for message in messages:
+                message.attempts += 1
+                message.claim_token = None
+                try:
+                    self._smtp.send(message.recipient, build_message(message.recipient, message.subject, message.body))
+                except Exception as e:
+                    self._smtp.close()
+                    message.last_error = str(e)[:500]
+                    if message.attempts >= self.max_attempts:
+                        message.status = EmailStatus.FAILED
+                        self._bump("failed")
+                    else:
+                        message.status = EmailStatus.PENDING
+                        message.next_attempt_at = datetime.utcnow() + timedelta(seconds=self.retry_base * 2 ** (message.attempts - 1))
+                        self._bump("retried")
+                else:
+                    message.status = EmailStatus.SENT
+                    message.sent_at = datetime.utcnow()
+                    message.last_error = None
+                    self._bump("sent")
+                db.commit()
+            if messages:
+                self._bump("batches")
+            return len(messages)
+        finally:
+            db.close()
+
+async def get_outbox_summary(db) -> dict:
+    """
+    État de livraison : nombre d'emails par statut et prochain envoi programmé
+    """
+    rows = (await db.execute(select(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status))).all()
+    next_attempt_at = await db.scalar(
+        select(func.min(EmailOutbox.next_attempt_at)).where(EmailOutbox.status == EmailStatus.PENDING)
+    )
+    counts = {EmailStatus(status).value: count for status, count in rows}
+    return {"counts": counts, "next_attempt_at": next_attempt_at}
+
+email_dispatcher = EmailDispatcher()
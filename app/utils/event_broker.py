@@ -0,0 +1,115 @@
+import asyncio
+import json
+import threading
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models.log import Log
+from app.utils.log_messages import log_row
+from app.config import SSE_QUEUE_SIZE
+
+def log_event(id: int, user_id, action: str, details, created_at) -> dict:
+    """
+    Événement publié pour un log ; le JSON (description rendue) est sérialisé une seule fois pour tous les abonnés
+    """
+    row = log_row(id, user_id, action, details, created_at)
+    row["created_at"] = created_at.isoformat()
+    return {
+        "id": id,
+        "user_id": user_id,
+        "action": action,
+        "data": json.dumps(row, ensure_ascii=False),
+    }
+
+class Subscription:
+    def __init__(self, action: str | None, user_id: int | None, queue_size: int):
+        self.action = action
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.evicted = False
+
+    def matches(self, event: dict) -> bool:
+        return (self.action is None or event["action"] == self.action) and \
+            (self.user_id is None or event["user_id"] == self.user_id)
+
+class EventBroker:
+    """
+    Pub/sub en mémoire du worker : chaque écriture de log est diffusée aux flux SSE abonnés.
+    Un abonné dont la file est pleine est évincé (il se reconnecte avec Last-Event-ID).
+    """
+
+    def __init__(self, queue_size=SSE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        self._loop = None
+        self._loop_thread = None
+        self.published = 0
+        self.evictions = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """
+        Rattache le broker à la boucle d'événements de l'application (au démarrage)
+        """
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+
+    def subscribe(self, action: str | None = None, user_id: int | None = None) -> Subscription:
+        subscription = Subscription(action, user_id, self.queue_size)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+
+    def publish(self, events: list[dict]):
+        """
+        Publie des événements ; utilisable depuis la boucle ou depuis un autre thread
+        """
+        if not events or self._loop is None or not self._subscriptions:
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._dispatch(events)
+        else:
+            self._loop.call_soon_threadsafe(self._dispatch, events)
+
+    def _dispatch(self, events: list[dict]):
+        self.published += len(events)
+        for subscription in list(self._subscriptions):
+            for item in events:
+                if not subscription.matches(item):
+                    continue
+                try:
+                    subscription.queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    self._evict(subscription)
+                    break
+
+    def _evict(self, subscription: Subscription):
+        self.evictions += 1
+        subscription.evicted = True
+        self._subscriptions.discard(subscription)
+        # Vider la file pour y déposer le signal de fin
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self._subscriptions), "published": self.published, "evictions": self.evictions}
+
+event_broker = EventBroker()
+
+# Logs écrits via l'ORM : collectés au flush, publiés seulement une fois la transaction validée
+@event.listens_for(Session, "after_flush")
+def _collect_log_events(session, flush_context):
+    new_logs = [obj for obj in session.new if isinstance(obj, Log)]
+    if new_logs:
+        session.info.setdefault("log_events", []).extend(
+            log_event(log.id, log.user_id, log.action, log.details, log.created_at) for log in new_logs
+        )
+
+@event.listens_for(Session, "after_commit")
+def _publish_log_events(session):
+    event_broker.publish(session.info.pop("log_events", None))
+
+@event.listens_for(Session, "after_rollback")
+def _discard_log_events(session):
+    session.info.pop("log_events", None)
@@ -0,0 +1,106 @@
+"""
+Moteur de règles de détection des fraudes, évalué colonne par colonne sur des tableaux NumPy :
+chaque règle est une opération vectorisée sur tout le lot, sans boucle Python par transaction.
+"""
+from dataclasses import dataclass
+import numpy as np
+from app.models.enum.enums import FraudRule
+from app.config import (
+    FRAUD_AMOUNT_THRESHOLD,
+    FRAUD_BLOCKED_COUNTRIES,
+    FRAUD_BLOCKED_MERCHANTS,
+    FRAUD_NIGHT_START_HOUR,
+    FRAUD_NIGHT_END_HOUR,
+    FRAUD_NIGHT_AMOUNT_THRESHOLD,
+    FRAUD_ALERT_SCORE
+)
+
+# Poids de chaque règle dans le score (somme plafonnée à 100)
+RULE_WEIGHTS = {
+    FraudRule.AMOUNT_THRESHOLD: 40,
+    FraudRule.BLOCKED_COUNTRY: 60,
+    FraudRule.BLOCKED_MERCHANT: 60,
+    FraudRule.NIGHT_TIME: 20,
+}
+MAX_SCORE = 100
+
+def _split(value: str) -> tuple[str, ...]:
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+def rule_labels(bits: int) -> list[str]:
+    """
+    Noms des règles présentes dans un masque (colonne transactions.triggered_rules)
+    """
+    return [rule.label for rule in FraudRule if bits & rule]
+
+@dataclass
+class TransactionColumns:
+    """
+    Lot de transactions en colonnes, prêt pour l'évaluation vectorisée
+    """
+    amounts: np.ndarray  # float64
+    countries: np.ndarray  # codes pays en majuscules
+    merchants: np.ndarray  # noms de commerçants en minuscules
+    occurred_at: np.ndarray  # datetime64[s], UTC
+
+    @classmethod
+    def from_rows(cls, rows) -> "TransactionColumns":
+        """
+        Transpose des transactions validées (TransactionCreate) : une passe par colonne
+        """
+        return cls(
+            amounts=np.fromiter((row.amount for row in rows), dtype=np.float64, count=len(rows)),
+            countries=np.array([row.country for row in rows], dtype=str),
+            merchants=np.char.lower(np.array([row.merchant for row in rows], dtype=str)),
+            occurred_at=np.array([row.occurred_at for row in rows], dtype="datetime64[s]"),
+        )
+
+    def __len__(self):
+        return len(self.amounts)
+
+@dataclass(frozen=True)
+class FraudRules:
+    amount_threshold: float = FRAUD_AMOUNT_THRESHOLD
+    blocked_countries: tuple[str, ...] = _split(FRAUD_BLOCKED_COUNTRIES.upper())
+    blocked_merchants: tuple[str, ...] = _split(FRAUD_BLOCKED_MERCHANTS.lower())
+    night_start_hour: int = FRAUD_NIGHT_START_HOUR
+    night_end_hour: int = FRAUD_NIGHT_END_HOUR
+    night_amount_threshold: float = FRAUD_NIGHT_AMOUNT_THRESHOLD
+    alert_score: int = FRAUD_ALERT_SCORE
+
+    def _night(self, columns: TransactionColumns) -> np.ndarray:
+        if self.night_start_hour == self.night_end_hour:
+            return np.zeros(len(columns), dtype=bool)  # Plage vide : règle désactivée
+        hours = (columns.occurred_at - columns.occurred_at.astype("datetime64[D]")).astype("timedelta64[h]").astype(np.int64)
+        if self.night_start_hour < self.night_end_hour:
+            in_window = (hours >= self.night_start_hour) & (hours < self.night_end_hour)
+        else:
+            # Plage à cheval sur minuit (ex. 22 h -> 5 h)
+            in_window = (hours >= self.night_start_hour) | (hours < self.night_end_hour)
+        return in_window & (columns.amounts >= self.night_amount_threshold)
+
+    def evaluate(self, columns: TransactionColumns) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Score (0-100) et masque des règles déclenchées, pour chaque transaction du lot
+        """
+        masks = {
+            FraudRule.AMOUNT_THRESHOLD: columns.amounts >= self.amount_threshold,
+            FraudRule.NIGHT_TIME: self._night(columns),
+        }
+        if self.blocked_countries:
+            masks[FraudRule.BLOCKED_COUNTRY] = np.isin(columns.countries, self.blocked_countries)
+        if self.blocked_merchants:
+            masks[FraudRule.BLOCKED_MERCHANT] = np.isin(columns.merchants, self.blocked_merchants)
+
+        scores = np.zeros(len(columns), dtype=np.int16)
+        rules = np.zeros(len(columns), dtype=np.int16)
+        for rule, mask in masks.items():
+            np.add(scores, RULE_WEIGHTS[rule], out=scores, where=mask)
+            np.bitwise_or(rules, int(rule), out=rules, where=mask)
+        np.minimum(scores, MAX_SCORE, out=scores)
+        return scores, rules
+
+    def alerts(self, scores: np.ndarray) -> np.ndarray:
+        return scores >= self.alert_score
+
+fraud_rules = FraudRules()
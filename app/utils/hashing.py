@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from app.config import (
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_QUEUE_SIZE,
+    PASSWORD_HASH_TIMEOUT,
+    PASSWORD_HASH_RETRY_AFTER
+)
+from app.utils.metrics import record_hashing
+
+class PasswordHasher:
+    """
+    Service unique de hachage des mots de passe.
+
+    bcrypt s'exécute dans un pool de threads dédié, de taille fixe, pour ne pas occuper
+    le pool partagé de FastAPI. Au-delà de workers + queue_size opérations en cours,
+    les nouvelles demandes sont refusées immédiatement (503 + Retry-After).
+    """
+
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, queue_size=PASSWORD_HASH_QUEUE_SIZE,
+                 timeout=PASSWORD_HASH_TIMEOUT, retry_after=PASSWORD_HASH_RETRY_AFTER):
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._ops = {}
+
+    def hash(self, password: str) -> str:
+        return self._run("hash", self.context.hash, password)
+
+    def verify(self, password: str, hashed: str | None) -> bool:
+        return self._run("verify", self.context.verify, password, hashed)
+
+    def verify_and_update(self, password: str, hashed: str | None) -> tuple[bool, str | None]:
+        """
+        Vérifie le mot de passe et renvoie un nouveau hash si l'actuel est obsolète (needs_update)
+        """
+        return self._run("verify", self.context.verify_and_update, password, hashed)
+
+    async def ahash(self, password: str) -> str:
+        return await self._arun("hash", self.context.hash, password)
+
+    async def averify(self, password: str, hashed: str | None) -> bool:
+        return await self._arun("verify", self.context.verify, password, hashed)
+
+    async def averify_and_update(self, password: str, hashed: str | None) -> tuple[bool, str | None]:
+        return await self._arun("verify", self.context.verify_and_update, password, hashed)
+
+    def needs_update(self, hashed: str) -> bool:
+        return self.context.needs_update(hashed)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "operations": {name: dict(op) for name, op in self._ops.items()},
+            }
+
+    def _overloaded(self):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service momentanément surchargé, veuillez réessayer",
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+    def _submit(self, name, func, *args):
+        # Contrôle d'admission : pas d'attente si le pool et sa file sont pleins
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise self._overloaded()
+        with self._lock:
+            self._in_flight += 1
+        submitted = time.perf_counter()
+        try:
+            future = self._executor.submit(self._timed, name, submitted, func, *args)
+        except RuntimeError:
+            self._release()
+            raise self._overloaded()
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _timed_out(self, future):
+        future.cancel()
+        with self._lock:
+            self._timeouts += 1
+        return self._overloaded()
+
+    def _run(self, name, func, *args):
+        future = self._submit(name, func, *args)
+        started = time.perf_counter()
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise self._timed_out(future)
+        finally:
+            record_hashing(time.perf_counter() - started)
+
+    async def _arun(self, name, func, *args):
+        future = self._submit(name, func, *args)
+        # Temps vu par la requête (attente dans la file comprise), imputé à sa route dans /metrics
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(future)
+        finally:
+            record_hashing(time.perf_counter() - started)
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _timed(self, name, submitted, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                op = self._ops.setdefault(name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0, "queue_seconds": 0.0})
+                op["count"] += 1
+                op["seconds"] += finished - started
+                op["max_seconds"] = max(op["max_seconds"], finished - started)
+                op["queue_seconds"] += started - submitted
+
+password_hasher = PasswordHasher()
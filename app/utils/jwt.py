@@ -1,16 +1,42 @@
+import hashlib
+import secrets
+import time
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status, Cookie
-from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, JWT_CACHE_SIZE
+from app.utils.cache import TTLCache
+from app.utils.metrics import record_jwt
+from app.utils.revocation import token_revocation
+
+# Tokens déjà vérifiés : évite de refaire décodage et contrôle HMAC à chaque requête
+token_cache = TTLCache(JWT_CACHE_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # jti : identifiant du token (révocation à la déconnexion) ; iat à la microseconde près, pour qu'un
+    # token émis juste après une révocation de toutes les sessions de l'utilisateur reste valide
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": secrets.token_urlsafe(12)})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(access_token: str = Cookie(None, alias="access_token")):
+def decode_access_token(token: str) -> dict:
+    """
+    Décode et vérifie un token, en s'appuyant sur le cache tant que le token n'a pas expiré.
+    Lève JWTError si le token est invalide.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    ttl = payload.get("exp", 0) - time.time()
+    if ttl > 0:
+        token_cache.set(key, payload, ttl=ttl)
+    return payload
+
+async def get_token_payload(access_token: str = Cookie(None, alias="access_token")) -> dict:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid or missing token",
@@ -20,12 +46,21 @@ def get_current_user(access_token: str = Cookie(None, alias="access_token")):
         raise credentials_exception
     
     # Extraire le token du format "Bearer <token>"
+    started = time.perf_counter()
     try:
         token = access_token.replace("Bearer ", "")
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        payload = decode_access_token(token)
+        if payload.get("sub") is None:
             raise credentials_exception
-        return user_id
     except JWTError:
-        raise credentials_exception
\ No newline at end of file
+        raise credentials_exception
+    finally:
+        record_jwt(time.perf_counter() - started)
+    # Contrôle à chaque requête, y compris pour un token servi depuis le cache
+    if await token_revocation.is_revoked(payload):
+        raise credentials_exception
+    return payload
+
+def get_current_user(payload: dict = Depends(get_token_payload)):
+    user_id: str = payload.get("sub")
+    return user_id
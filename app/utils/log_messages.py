@@ -0,0 +1,68 @@
+"""
+Descriptions lisibles des logs d'audit, rendues à la lecture à partir de l'action et de ses détails.
+
+Les logs ne stockent que des paramètres structurés (ex. {"reason": "email_taken", "email": "..."}) :
+le texte n'est plus dupliqué dans chaque ligne de la table et peut évoluer sans migration.
+"""
+
+# Gabarits par action puis par motif (clé "reason" des détails ; None : pas de motif)
+TEMPLATES = {
+    "login_success": {
+        None: "Connexion réussie",
+    },
+    "login_failed": {
+        "unknown_email": "Tentative de connexion échouée pour l'email {email}",
+        "wrong_password": "Mot de passe incorrect",
+    },
+    "update_profile_success": {
+        None: "Profil mis à jour : {fields}",
+        "no_change": "Profil mis à jour (aucun champ modifié)",
+    },
+    "update_profile_failed": {
+        "user_not_found": "Tentative de mise à jour du profil pour un utilisateur non trouvé (ID: {subject})",
+        "email_taken": "Tentative de mise à jour de l'email à {email} échouée : email déjà utilisé",
+    },
+    "change_password_success": {
+        None: "Mot de passe mis à jour avec succès",
+    },
+    "change_password_failed": {
+        "user_not_found": "Tentative de changement de mot de passe pour un utilisateur non trouvé (ID: {subject})",
+        "confirmation_mismatch": "Les nouveaux mots de passe ne correspondent pas",
+        "wrong_old_password": "Ancien mot de passe incorrect",
+        "same_password": "Le nouveau mot de passe est identique à l'ancien",
+    },
+    "fraud_alert": {
+        None: "Alerte fraude sur la transaction {transaction} (score {score}) : {rules}",
+    },
+}
+
+def render_description(action: str, details: dict | None) -> str | None:
+    """
+    Description d'un log ; None si l'action n'a pas de gabarit pour ces détails
+    """
+    details = details or {}
+    if "text" in details:
+        # Ligne migrée depuis l'ancien format : description d'origine conservée telle quelle
+        return details["text"]
+    template = TEMPLATES.get(action, {}).get(details.get("reason"))
+    if template is None:
+        return None
+    params = dict(details)
+    if isinstance(params.get("fields"), dict):
+        params["fields"] = ", ".join(f"{key}={value}" for key, value in params["fields"].items())
+    try:
+        return template.format(**params)
+    except (KeyError, IndexError):
+        return template
+
+def log_row(id: int, user_id, action: str, details, created_at) -> dict:
+    """
+    Log au format de LogResponse (description rendue)
+    """
+    return {
+        "id": id,
+        "user_id": user_id,
+        "action": action,
+        "description": render_description(action, details),
+        "created_at": created_at,
+    }
@@ -0,0 +1,96 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, select, delete, insert
+from sqlalchemy.orm import Session
+from app.models.log import Log, LogActionCount
+
+def hour_bucket(moment: datetime) -> datetime:
+    """
+    Ramène une date au début de son heure
+    """
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+def hour_bucket_ceil(moment: datetime) -> datetime:
+    """
+    Ramène une date au début de l'heure suivante (sauf si elle est déjà alignée)
+    """
+    bucket = hour_bucket(moment)
+    return bucket if bucket == moment else bucket + timedelta(hours=1)
+
+def _upsert(connection, rows):
+    table = LogActionCount.__table__
+    dialect = connection.dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table).values(rows)
+        stmt = stmt.on_duplicate_key_update(count=table.c["count"] + stmt.inserted["count"])
+    elif dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.action, table.c.bucket],
+            set_={"count": table.c["count"] + stmt.excluded["count"]}
+        )
+    else:
+        raise NotImplementedError(f"Dialecte non supporté pour les compteurs de logs : {dialect}")
+    connection.execute(stmt)
+
+def increment_action_counts(connection, entries):
+    """
+    Incrémente les compteurs pour une série de (action, created_at), dans la transaction de la connexion
+    """
+    counts = Counter((action, hour_bucket(created_at)) for action, created_at in entries)
+    if not counts:
+        return
+    rows = [{"action": action, "bucket": bucket, "count": count} for (action, bucket), count in counts.items()]
+    # Ordre stable pour limiter les interblocages entre transactions concurrentes
+    rows.sort(key=lambda row: (row["action"], row["bucket"]))
+    _upsert(connection, rows)
+
+@event.listens_for(Session, "after_flush")
+def _count_new_logs(session, flush_context):
+    # Chaque Log ajouté via l'ORM met à jour les compteurs dans la même transaction
+    entries = [
+        (obj.action, obj.created_at or datetime.utcnow())
+        for obj in session.new
+        if isinstance(obj, Log)
+    ]
+    if entries:
+        increment_action_counts(session.connection(), entries)
+
+async def get_action_counts(db, since: datetime | None = None, until: datetime | None = None) -> dict:
+    """
+    Somme les compteurs par action sur une fenêtre alignée sur l'heure : O(nombre d'heures)
+    """
+    query = select(LogActionCount.action, func.sum(LogActionCount.count)).group_by(LogActionCount.action)
+    if since:
+        query = query.where(LogActionCount.bucket >= hour_bucket(since))
+    if until:
+        query = query.where(LogActionCount.bucket < hour_bucket_ceil(until))
+    return {action: int(total) for action, total in (await db.execute(query)).all()}
+
+def _hour_expression(dialect: str):
+    if dialect == "mysql":
+        return func.date_format(Log.created_at, "%Y-%m-%d %H:00:00")
+    if dialect == "sqlite":
+        # Même format texte que celui utilisé par SQLAlchemy pour stocker DateTime sous SQLite
+        return func.strftime("%Y-%m-%d %H:00:00.000000", Log.created_at)
+    if dialect == "postgresql":
+        return func.date_trunc("hour", Log.created_at)
+    raise NotImplementedError(f"Dialecte non supporté pour les compteurs de logs : {dialect}")
+
+def rebuild_action_counts(connection):
+    """
+    Recalcule tous les compteurs à partir de la table logs, en une seule transaction
+    """
+    bucket = _hour_expression(connection.dialect.name)
+    connection.execute(delete(LogActionCount))
+    connection.execute(
+        insert(LogActionCount).from_select(
+            ["action", "bucket", "count"],
+            select(Log.action, bucket, func.count(Log.id)).group_by(Log.action, bucket)
+        )
+    )
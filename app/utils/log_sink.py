@@ -0,0 +1,188 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import insert
+from app.database import engine
+from app.models.log import Log
+from app.utils.log_rollup import increment_action_counts
+from app.utils.event_broker import event_broker, log_event
+from app.utils.conditional import resource_versions
+from app.config import (
+    AUDIT_LOG_MODE,
+    AUDIT_LOG_QUEUE_SIZE,
+    AUDIT_LOG_BATCH_SIZE,
+    AUDIT_LOG_FLUSH_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+# Nombre de tentatives d'insertion d'un lot avant abandon
+FLUSH_RETRIES = 3
+
+class LogSink:
+    """
+    Point d'écriture unique du journal d'audit.
+
+    En mode "sync", le log est ajouté à la session de la requête (même transaction).
+    En mode "batched", il est placé dans une file bornée et un thread dédié l'insère
+    avec les suivants en une seule requête multi-lignes, par taille de lot ou par délai.
+    Si la file est pleine, l'écriture repasse en synchrone plutôt que de perdre le log.
+    """
+
+    def __init__(self, mode=AUDIT_LOG_MODE, queue_size=AUDIT_LOG_QUEUE_SIZE, batch_size=AUDIT_LOG_BATCH_SIZE,
+                 flush_interval=AUDIT_LOG_FLUSH_INTERVAL):
+        if mode not in ("sync", "batched"):
+            raise ValueError(f"Mode de journal d'audit inconnu : {mode}")
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "flush_errors": 0,
+            "dropped": 0,
+            "overflow_sync_writes": 0,
+            "max_queue_depth": 0,
+            "last_batch_size": 0,
+            "last_flush_seconds": 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.mode != "batched" or self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-log-sink", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Arrête le thread après avoir vidé la file (appelé à l'arrêt de l'application)
+        """
+        if not self.running:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+        # Logs arrivés pendant l'arrêt du thread
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            self._flush(leftover)
+
+    async def record(self, db, user_id, action: str, details: dict | None = None, commit: bool = True,
+                     transactional: bool = False):
+        """
+        Enregistre un log d'audit ; details contient les paramètres de l'événement (voir app/utils/log_messages.py).
+        commit=False laisse l'appelant valider sa propre transaction (mode sync : le log en fait partie).
+        transactional=True écrit toujours le log dans la session de l'appelant, même en mode "batched" :
+        il n'existe que si la transaction de l'appelant est validée.
+        """
+        entry = {"user_id": user_id, "action": action, "details": details, "created_at": datetime.utcnow()}
+        if self.mode == "batched" and self.running and not transactional:
+            try:
+                # Jamais bloquant : on est dans la boucle d'événements
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                # File saturée : contre-pression, la requête écrit elle-même son log
+                self._bump("overflow_sync_writes")
+            else:
+                with self._lock:
+                    self._stats["enqueued"] += 1
+                    self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._queue.qsize())
+                return
+        db.add(Log(**entry))
+        if commit:
+            await db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["mode"] = self.mode
+        stats["running"] = self.running
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_capacity"] = self._queue.maxsize
+        return stats
+
+    def _bump(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif self._stopping.is_set():
+                return
+
+    def _collect(self):
+        """
+        Attend un premier log puis regroupe les suivants jusqu'à batch_size ou flush_interval
+        """
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert(self, connection, batch) -> list[int]:
+        """
+        Insère le lot et renvoie les ids générés, dans l'ordre du lot
+        """
+        if connection.dialect.insert_executemany_returning_sort_by_parameter_order:
+            result = connection.execute(insert(Log).returning(Log.id, sort_by_parameter_order=True), batch)
+            return list(result.scalars())
+        # MySQL : une seule instruction INSERT multi-lignes ; ses ids auto-incrémentés sont
+        # consécutifs à partir de lastrowid (insertion « simple », quel que soit innodb_autoinc_lock_mode)
+        result = connection.execute(insert(Log).values(batch))
+        return list(range(result.lastrowid, result.lastrowid + len(batch)))
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        for attempt in range(1, FLUSH_RETRIES + 1):
+            try:
+                with engine.begin() as connection:
+                    ids = self._insert(connection, batch)
+                    increment_action_counts(connection, ((row["action"], row["created_at"]) for row in batch))
+                break
+            except Exception:
+                self._bump("flush_errors")
+                logger.exception("Échec d'insertion d'un lot de %d logs (tentative %d)", len(batch), attempt)
+                if attempt == FLUSH_RETRIES:
+                    self._bump("dropped", len(batch))
+                    return
+                time.sleep(0.1 * 2 ** attempt)
+        resource_versions.bump("logs")
+        event_broker.publish([
+            log_event(id, row["user_id"], row["action"], row["details"], row["created_at"])
+            for id, row in zip(ids, batch)
+        ])
+        with self._lock:
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["last_batch_size"] = len(batch)
+            self._stats["last_flush_seconds"] = time.perf_counter() - started
+
+log_sink = LogSink()
@@ -0,0 +1,182 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request, status
+from app.config import (
+    LOGIN_FAILURE_WINDOW,
+    LOGIN_MAX_FAILURES_PER_EMAIL,
+    LOGIN_MAX_FAILURES_PER_IP,
+    LOGIN_LOCKOUT_SECONDS,
+    LOGIN_GUARD_MAX_KEYS,
+    LOGIN_GUARD_REDIS_URL,
+    TRUST_PROXY_HEADERS
+)
+
+# Nombre de tranches de la fenêtre glissante (précision = fenêtre / SLOTS)
+SLOTS = 10
+
+class SlidingWindow:
+    """
+    Compteur sur fenêtre glissante en anneau : SLOTS cases, mise à jour O(1), mémoire fixe
+    """
+    __slots__ = ("counts", "epochs", "locked_until")
+
+    def __init__(self):
+        self.counts = [0] * SLOTS
+        self.epochs = [-1] * SLOTS
+        self.locked_until = 0.0
+
+    def add(self, epoch: int) -> int:
+        index = epoch % SLOTS
+        if self.epochs[index] != epoch:
+            self.epochs[index] = epoch
+            self.counts[index] = 0
+        self.counts[index] += 1
+        return self.total(epoch)
+
+    def total(self, epoch: int) -> int:
+        return sum(count for count, slot_epoch in zip(self.counts, self.epochs) if epoch - slot_epoch < SLOTS)
+
+    def clear(self):
+        self.counts = [0] * SLOTS
+
+class MemoryBackend:
+    """
+    Compteurs en mémoire du worker, bornés à max_keys clés (les moins récemment utilisées sont évincées)
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _window(self, key: str, create: bool):
+        window = self._windows.get(key)
+        if window is None and create:
+            window = self._windows[key] = SlidingWindow()
+            while len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+        if window is not None:
+            self._windows.move_to_end(key)
+        return window
+
+    async def locked_for(self, key: str, now: float) -> float:
+        with self._lock:
+            window = self._window(key, create=False)
+            return max(window.locked_until - now, 0.0) if window else 0.0
+
+    async def add_failure(self, key: str, epoch: int) -> int:
+        with self._lock:
+            return self._window(key, create=True).add(epoch)
+
+    async def lock(self, key: str, until: float):
+        with self._lock:
+            self._window(key, create=True).locked_until = until
+
+    async def reset(self, key: str, epoch: int):
+        with self._lock:
+            window = self._window(key, create=False)
+            if window:
+                window.clear()
+
+    def __len__(self):
+        return len(self._windows)
+
+class RedisBackend:
+    """
+    Compteurs partagés entre workers : une clé Redis par tranche de fenêtre, expirant avec la fenêtre
+    """
+
+    def __init__(self, url: str, slot_seconds: int):
+        import redis.asyncio as redis  # Dépendance optionnelle
+        self.redis = redis.from_url(url)
+        self.slot_seconds = slot_seconds
+
+    async def locked_for(self, key: str, now: float) -> float:
+        ttl = await self.redis.pttl(f"login_guard:lock:{key}")
+        return ttl / 1000 if ttl and ttl > 0 else 0.0
+
+    def _count_keys(self, key: str, epoch: int) -> list[str]:
+        return [f"login_guard:count:{key}:{slot_epoch}" for slot_epoch in range(epoch - SLOTS + 1, epoch + 1)]
+
+    async def add_failure(self, key: str, epoch: int) -> int:
+        keys = self._count_keys(key, epoch)
+        pipeline = self.redis.pipeline()
+        pipeline.incr(keys[-1])
+        pipeline.expire(keys[-1], self.slot_seconds * SLOTS)
+        pipeline.mget(keys)
+        _, _, counts = await pipeline.execute()
+        return sum(int(count) for count in counts if count)
+
+    async def lock(self, key: str, until: float):
+        await self.redis.set(f"login_guard:lock:{key}", 1, px=max(int((until - time.time()) * 1000), 1))
+
+    async def reset(self, key: str, epoch: int):
+        await self.redis.delete(*self._count_keys(key, epoch))
+
+class LoginGuard:
+    """
+    Limite les échecs de connexion par email et par IP client sur une fenêtre glissante.
+    Le contrôle a lieu avant toute lecture en base et tout calcul bcrypt.
+    """
+
+    def __init__(self, window=LOGIN_FAILURE_WINDOW, max_per_email=LOGIN_MAX_FAILURES_PER_EMAIL,
+                 max_per_ip=LOGIN_MAX_FAILURES_PER_IP, lockout=LOGIN_LOCKOUT_SECONDS,
+                 max_keys=LOGIN_GUARD_MAX_KEYS, redis_url=LOGIN_GUARD_REDIS_URL):
+        self.slot_seconds = max(window // SLOTS, 1)
+        self.limits = {"email": max_per_email, "ip": max_per_ip}
+        self.lockout = lockout
+        self.backend = RedisBackend(redis_url, self.slot_seconds) if redis_url else MemoryBackend(max_keys)
+        self.throttled = 0
+        self.lockouts = 0
+
+    def _keys(self, email: str, ip: str | None) -> list[tuple[str, str]]:
+        keys = [("email", f"email:{email.lower()}")]
+        if ip:
+            keys.append(("ip", f"ip:{ip}"))
+        return keys
+
+    async def check(self, email: str, ip: str | None):
+        """
+        Lève une 429 (avec Retry-After) si l'email ou l'IP est verrouillé
+        """
+        now = time.time()
+        for _, key in self._keys(email, ip):
+            remaining = await self.backend.locked_for(key, now)
+            if remaining > 0:
+                self.throttled += 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Trop de tentatives de connexion, veuillez réessayer plus tard",
+                    headers={"Retry-After": str(math.ceil(remaining))}
+                )
+
+    async def record_failure(self, email: str, ip: str | None):
+        now = time.time()
+        epoch = int(now) // self.slot_seconds
+        for kind, key in self._keys(email, ip):
+            if await self.backend.add_failure(key, epoch) >= self.limits[kind]:
+                await self.backend.lock(key, now + self.lockout)
+                await self.backend.reset(key, epoch)
+                self.lockouts += 1
+
+    async def record_success(self, email: str):
+        await self.backend.reset(f"email:{email.lower()}", int(time.time()) // self.slot_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "throttled": self.throttled,
+            "lockouts": self.lockouts,
+            "tracked_keys": len(self.backend) if isinstance(self.backend, MemoryBackend) else None,
+        }
+
+def client_ip(request: Request) -> str | None:
+    if TRUST_PROXY_HEADERS:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else None
+
+login_guard = LoginGuard()
@@ -0,0 +1,213 @@
+"""
+Instrumentation par requête : latence totale, temps et nombre de requêtes SQL, temps de hachage
+et de vérification JWT, par route. Exposée au format texte Prometheus sur /metrics.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from sqlalchemy import event
+from app.config import SLOW_QUERY_MS, SLOW_QUERY_LOG_SIZE
+
+logger = logging.getLogger("app.slow_query")
+
+# Bornes des histogrammes de durée (secondes) et de nombre de requêtes SQL
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+# Étiquette des requêtes SQL émises hors requête HTTP (threads d'arrière-plan, scripts)
+BACKGROUND_ROUTE = "background"
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple, labels: tuple):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for label_values, (counts, total, count) in sorted(series.items()):
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                bucket_labels = _labels((*self.labels, "le"), (*label_values, bound))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+def render_gauges(name: str, help: str, values: dict, label: str) -> list[str]:
+    """
+    Jauges d'un état instantané (statistiques des composants), une série par clé
+    """
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    for key, value in sorted(values.items()):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"{name}{_labels((label,), (key,))} {value}")
+    return lines
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Durée totale de traitement des requêtes HTTP",
+    DURATION_BUCKETS, ("method", "route", "status")
+)
+request_db_time = Histogram(
+    "http_request_db_seconds", "Temps passé en base de données par requête HTTP", DURATION_BUCKETS, ("route",)
+)
+request_statements = Histogram(
+    "http_request_sql_statements", "Nombre de requêtes SQL par requête HTTP", STATEMENT_BUCKETS, ("route",)
+)
+request_hashing_time = Histogram(
+    "http_request_hashing_seconds", "Temps de hachage/vérification bcrypt par requête HTTP", DURATION_BUCKETS, ("route",)
+)
+request_jwt_time = Histogram(
+    "http_request_jwt_seconds", "Temps de vérification du JWT par requête HTTP", DURATION_BUCKETS, ("route",)
+)
+sql_statements = Counter("sql_statements_total", "Requêtes SQL exécutées", ("route",))
+sql_time = Counter("sql_statement_seconds_total", "Temps cumulé des requêtes SQL", ("route",))
+slow_queries = Counter("sql_slow_statements_total", f"Requêtes SQL de plus de {SLOW_QUERY_MS} ms", ("route",))
+
+HISTOGRAMS = (request_duration, request_db_time, request_statements, request_hashing_time, request_jwt_time)
+COUNTERS = (sql_statements, sql_time, slow_queries)
+
+class RequestMetrics:
+    __slots__ = ("scope", "statements", "db_seconds", "hashing_seconds", "jwt_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.hashing_seconds = 0.0
+        self.jwt_seconds = 0.0
+
+# Mesures de la requête HTTP en cours (propagé aux tâches filles et aux greenlets SQLAlchemy)
+current_request: contextvars.ContextVar[RequestMetrics | None] = contextvars.ContextVar("current_request", default=None)
+
+# Dernières requêtes lentes, consultables via /monitoring/slow-queries
+recent_slow_queries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+def route_label(scope) -> str:
+    # Modèle de chemin (/users/{user_id}) et non chemin réel : cardinalité bornée
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+def record_hashing(seconds: float):
+    metrics = current_request.get()
+    if metrics is not None:
+        metrics.hashing_seconds += seconds
+
+def record_jwt(seconds: float):
+    metrics = current_request.get()
+    if metrics is not None:
+        metrics.jwt_seconds += seconds
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI : ouvre les mesures de la requête puis alimente les histogrammes par route
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        metrics = RequestMetrics(scope)
+        token = current_request.set(metrics)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = route_label(scope)
+            request_duration.observe(time.perf_counter() - started, scope["method"], route, status_code)
+            request_db_time.observe(metrics.db_seconds, route)
+            request_statements.observe(metrics.statements, route)
+            request_hashing_time.observe(metrics.hashing_seconds, route)
+            request_jwt_time.observe(metrics.jwt_seconds, route)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("query_started", time.perf_counter())
+    metrics = current_request.get()
+    if metrics is not None:
+        metrics.statements += 1
+        metrics.db_seconds += elapsed
+        # Le routage a déjà eu lieu quand le handler interroge la base
+        route = route_label(metrics.scope)
+    else:
+        route = BACKGROUND_ROUTE
+    sql_statements.inc(route)
+    sql_time.inc(route, amount=elapsed)
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_queries.inc(route)
+        recent_slow_queries.append({
+            "at": datetime.utcnow().isoformat(),
+            "route": route,
+            "duration_ms": round(elapsed * 1000, 2),
+            "statement": statement[:2000],
+        })
+        logger.warning("Requête SQL lente (%.1f ms) sur %s : %s", elapsed * 1000, route, statement[:2000])
+
+def instrument_queries(engine):
+    """
+    Branche le comptage et le chronométrage des requêtes SQL sur un moteur (synchrone ou asynchrone)
+    """
+    target = getattr(engine, "sync_engine", engine)
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,109 @@
+import bisect
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# Bornes (secondes) de l'histogramme des temps d'attente d'une connexion
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def record_wait(self, seconds: float, overflow: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+            if overflow:
+                self.overflow_checkouts += 1
+
+    def bump(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "wait_seconds": self.wait_seconds,
+                "max_wait_seconds": self.max_wait_seconds,
+                "wait_buckets": dict(zip([*map(str, WAIT_BUCKETS), "+Inf"], self.wait_buckets)),
+            }
+
+# Statistiques par nom de pool (pool_logging_name du moteur)
+pool_stats: dict[str, PoolStats] = {}
+_pools: dict[str, object] = {}
+
+class _TimedPoolMixin:
+    """
+    Mesure le temps d'attente de chaque emprunt de connexion et compte débordements et timeouts
+    """
+
+    def _do_get(self):
+        stats = pool_stats.setdefault(self.logging_name, PoolStats())
+        _pools[self.logging_name] = self
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            stats.bump("timeouts")
+            raise
+        stats.record_wait(time.perf_counter() - started, self.overflow() > 0)
+        return connection
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def instrument_engine(engine, name: str):
+    """
+    Branche les événements de connexion/invalidation du moteur sur ses statistiques
+    """
+    stats = pool_stats.setdefault(name, PoolStats())
+    target = getattr(engine, "sync_engine", engine)
+    if isinstance(target.pool, _TimedPoolMixin):
+        _pools[name] = target.pool
+
+    @event.listens_for(target, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.bump("connects")
+
+    @event.listens_for(target, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.bump("invalidations")
+
+def get_pool_metrics() -> dict:
+    """
+    Statistiques cumulées et état courant (connexions empruntées, débordement) de chaque pool
+    """
+    metrics = {}
+    for name, stats in pool_stats.items():
+        entry = stats.snapshot()
+        pool = _pools.get(name)
+        if pool is not None:
+            entry.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        metrics[name] = entry
+    return metrics
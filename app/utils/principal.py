@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models.users.user import User
+from app.models.enum.enums import Role, AnalystDepartment
+from app.utils.cache import TTLCache
+from app.utils.jwt import get_token_payload
+from app.config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL, JWT_ROLE_CLAIMS
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Utilisateur authentifié, réduit à ce dont les contrôles d'accès ont besoin
+    """
+    id: int
+    role: Role
+    department: AnalystDepartment
+
+principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
+def principal_claims(user: User) -> dict:
+    """
+    Claims à ajouter au JWT quand JWT_ROLE_CLAIMS est activé
+    """
+    if not JWT_ROLE_CLAIMS:
+        return {}
+    return {"role": Role(user.role).value, "department": AnalystDepartment(user.department).value}
+
+def invalidate_principal(user_id: int):
+    """
+    À appeler après toute modification (ou suppression) d'un utilisateur
+    """
+    principal_cache.pop(int(user_id))
+
+async def get_current_principal(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    try:
+        user_id = int(payload["sub"])
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
+
+    # Rôle signé dans le token : aucune lecture en base ni en cache
+    if JWT_ROLE_CLAIMS and "role" in payload and "department" in payload:
+        try:
+            return Principal(id=user_id, role=Role(payload["role"]), department=AnalystDepartment(payload["department"]))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
+
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        row = (await db.execute(select(User.role, User.department).filter(User.id == user_id))).first()
+        if not row:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur connecté non trouvé")
+        principal = Principal(id=user_id, role=Role(row.role), department=AnalystDepartment(row.department))
+        principal_cache.set(user_id, principal)
+    return principal
+
+def require_role(*roles: Role):
+    """
+    Dependency qui exige que l'utilisateur connecté ait l'un des rôles donnés
+    """
+    async def dependency(principal: Principal = Depends(get_current_principal)) -> Principal:
+        if principal.role not in roles:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Réservé aux administrateurs" if roles == (Role.ADMIN,) else "Accès non autorisé")
+        return principal
+    return dependency
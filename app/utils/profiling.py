@@ -0,0 +1,212 @@
+"""
+Profilage d'une requête en production : sur demande d'un administrateur (en-tête X-Profile: 1 ou ?profile=1)
+ou par échantillonnage (PROFILE_SAMPLE_RATE). Chaque profil est enregistré dans PROFILE_DIR avec sa route,
+sa durée et son nombre de requêtes SQL, puis consultable via /monitoring/profiles.
+
+pyinstrument (optionnel) produit un rendu HTML limité à la tâche de la requête ; à défaut, cProfile
+produit un fichier pstats (snakeviz, flameprof...) qui inclut aussi les autres tâches de la boucle
+pendant la mesure. Le travail délégué aux threads (bcrypt, journal d'audit) n'y figure pas.
+"""
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import time
+from datetime import datetime
+from urllib.parse import parse_qs
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from jose import JWTError
+from app.config import PROFILING_ENABLED, PROFILE_SAMPLE_RATE, PROFILE_DIR, PROFILE_MAX_FILES
+from app.database import AsyncSessionLocal
+from app.models.enum.enums import Role
+from app.utils.metrics import current_request, route_label
+from app.utils.jwt import get_token_payload
+from app.utils.principal import get_current_principal
+
+logger = logging.getLogger(__name__)
+
+# Identifiant d'un profil (nom de fichier sans extension)
+PROFILE_NAME = re.compile(r"^[0-9T]+-\d+-[0-9a-f]+$")
+EXTENSIONS = {"html": ".html", "pstats": ".prof"}
+
+try:
+    from pyinstrument import Profiler as _Pyinstrument  # Dépendance optionnelle
+except ImportError:
+    _Pyinstrument = None
+
+class ProfileStore:
+    """
+    Profils enregistrés sur disque : un artefact et ses métadonnées (JSON) par requête
+    """
+
+    def __init__(self, directory=PROFILE_DIR, max_files=PROFILE_MAX_FILES):
+        self.directory = directory
+        self.max_files = max_files
+
+    def save(self, name: str, profiler, metadata: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name + EXTENSIONS[metadata["format"]])
+        if metadata["format"] == "html":
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        else:
+            profiler.dump_stats(path)
+        with open(os.path.join(self.directory, name + ".json"), "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+        self._prune()
+
+    def _prune(self):
+        profiles = self.list()
+        for metadata in profiles[self.max_files:]:
+            for extension in (EXTENSIONS[metadata["format"]], ".json"):
+                try:
+                    os.remove(os.path.join(self.directory, metadata["name"] + extension))
+                except FileNotFoundError:
+                    pass  # Déjà supprimé par un autre worker
+
+    def list(self) -> list[dict]:
+        """
+        Métadonnées des profils, du plus récent au plus ancien
+        """
+        profiles = []
+        if not os.path.isdir(self.directory):
+            return profiles
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # Profil en cours d'écriture ou supprimé entre-temps
+        profiles.sort(key=lambda metadata: metadata["name"], reverse=True)
+        return profiles
+
+    def artifact(self, name: str) -> tuple[str, str] | None:
+        """
+        Chemin et format de l'artefact d'un profil ; None si le nom est invalide ou inconnu
+        """
+        if not PROFILE_NAME.match(name):
+            return None
+        for format, extension in EXTENSIONS.items():
+            path = os.path.join(self.directory, name + extension)
+            if os.path.isfile(path):
+                return path, format
+        return None
+
+profile_store = ProfileStore()
+
+def _requested(scope) -> bool:
+    for key, value in scope["headers"]:
+        if key == b"x-profile":
+            return value.strip() in (b"1", b"true")
+    query = scope.get("query_string", b"")
+    return b"profile=" in query and parse_qs(query.decode("latin-1")).get("profile", [""])[-1] in ("1", "true")
+
+def _cookie(scope) -> str | None:
+    for key, value in scope["headers"]:
+        if key == b"cookie":
+            for part in value.decode("latin-1").split(";"):
+                name, _, content = part.strip().partition("=")
+                if name == "access_token":
+                    return content.strip('"')
+    return None
+
+async def _is_admin(scope) -> bool:
+    """
+    Même contrôle que require_role(Role.ADMIN), fait ici car le profil doit démarrer avant la route
+    """
+    cookie = _cookie(scope)
+    if not cookie:
+        return False
+    try:
+        payload = await get_token_payload(cookie)
+        async with AsyncSessionLocal() as db:
+            principal = await get_current_principal(payload, db)
+    except (HTTPException, JWTError):
+        return False
+    return principal.role == Role.ADMIN
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI : une requête à la fois est profilée par worker (les profileurs Python ne s'empilent
+    pas) ; les autres passent sans surcoût au-delà du test du drapeau
+    """
+
+    def __init__(self, app, on_demand=PROFILING_ENABLED, sample_rate=PROFILE_SAMPLE_RATE, store=profile_store):
+        self.app = app
+        self.on_demand = on_demand
+        self.sample_rate = sample_rate
+        self.store = store
+        self._active = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trigger = None
+        if self.on_demand and _requested(scope):
+            trigger = "flag"
+        elif self.sample_rate and random.random() < self.sample_rate:
+            trigger = "sampled"
+        if trigger is None:
+            return await self.app(scope, receive, send)
+        if self._active or (trigger == "flag" and not await _is_admin(scope)):
+            return await self.app(scope, receive, send)
+        await self._profile(scope, receive, send, trigger)
+
+    async def _profile(self, scope, receive, send, trigger: str):
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{os.getpid()}-{secrets.token_hex(3)}"
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if trigger == "flag":
+                    message["headers"] = [*message.get("headers", []), (b"x-profile-id", name.encode())]
+            await send(message)
+
+        if _Pyinstrument is not None:
+            profiler, format = _Pyinstrument(async_mode="enabled"), "html"
+        else:
+            import cProfile
+            profiler, format = cProfile.Profile(), "pstats"
+        # Mesures SQL de la requête (MetricsMiddleware, en amont) : relevé avant/après
+        metrics = current_request.get()
+        statements, db_seconds = (metrics.statements, metrics.db_seconds) if metrics else (0, 0.0)
+        self._active = True
+        started = time.perf_counter()
+        if format == "html":
+            profiler.start()
+        else:
+            profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if format == "html":
+                profiler.stop()
+            else:
+                profiler.disable()
+            duration = time.perf_counter() - started
+            self._active = False
+        metadata = {
+            "name": name,
+            "format": format,
+            "trigger": trigger,
+            "captured_at": datetime.utcnow().isoformat(),
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route_label(scope),
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 2),
+            "sql_statements": metrics.statements - statements if metrics else None,
+            "db_ms": round((metrics.db_seconds - db_seconds) * 1000, 2) if metrics else None,
+        }
+        # Sérialisation et écriture hors de la boucle d'événements ; un échec ne doit pas toucher la réponse
+        try:
+            await run_in_threadpool(self.store.save, name, profiler, metadata)
+        except Exception:
+            logger.exception("Enregistrement du profil %s impossible", name)
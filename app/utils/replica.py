@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from app.config import REPLICA_MAX_LAG_SECONDS, REPLICA_CHECK_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+async def _replication_lag(connection) -> float:
+    """
+    Retard de la réplique en secondes (0 si le moteur ne l'expose pas, ex. SQLite en local)
+    """
+    dialect = connection.dialect.name
+    if dialect == "mysql":
+        for statement, column in (("SHOW REPLICA STATUS", "Seconds_Behind_Source"), ("SHOW SLAVE STATUS", "Seconds_Behind_Master")):
+            try:
+                row = (await connection.execute(text(statement))).mappings().first()
+            except OperationalError:
+                continue
+            if row is None:
+                return 0.0  # Pas de réplication configurée : même contenu que le primaire
+            lag = row.get(column)
+            # NULL : réplication arrêtée
+            return float(lag) if lag is not None else float("inf")
+        return 0.0
+    if dialect == "postgresql":
+        lag = await connection.scalar(text(
+            "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+        ))
+        return float(lag or 0)
+    await connection.execute(text("SELECT 1"))
+    return 0.0
+
+class ReplicaHealth:
+    """
+    Surveille la réplique (joignable, retard sous max_lag) ; tant qu'elle ne l'est pas, les lectures vont au primaire.
+    Une erreur de connexion sur la réplique la déclasse immédiatement, sans attendre le prochain contrôle.
+    """
+
+    def __init__(self, engine, max_lag=REPLICA_MAX_LAG_SECONDS, interval=REPLICA_CHECK_INTERVAL):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.interval = interval
+        self.healthy = False
+        self.lag = None
+        self.last_error = None
+        self.last_check = None
+        self.fallbacks = 0
+        self._task = None
+        if engine is not None:
+            event.listen(engine.sync_engine, "handle_error", self._on_error)
+
+    @property
+    def configured(self) -> bool:
+        return self.engine is not None
+
+    def _on_error(self, context):
+        if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+            if self.healthy:
+                logger.warning("Réplique déclassée après une erreur : %s", context.original_exception)
+            self.healthy = False
+            self.last_error = str(context.original_exception)[:500]
+
+    async def check(self):
+        try:
+            async with self.engine.connect() as connection:
+                self.lag = await _replication_lag(connection)
+            self.last_error = None if self.lag <= self.max_lag else f"Retard de réplication : {self.lag:.1f} s"
+        except Exception as e:
+            self.lag = None
+            self.last_error = str(e)[:500]
+        healthy = self.last_error is None
+        if healthy != self.healthy:
+            logger.warning("Réplique %s", "rétablie" if healthy else f"écartée : {self.last_error}")
+        self.healthy = healthy
+        self.last_check = time.time()
+
+    async def _run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.configured and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "configured": self.configured,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "max_lag_seconds": self.max_lag,
+            "last_error": self.last_error,
+            "last_check": self.last_check,
+            "primary_fallbacks": self.fallbacks,
+        }
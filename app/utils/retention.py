@@ -0,0 +1,123 @@
+import gzip
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+from sqlalchemy import select, delete, or_
+from app.database import engine
+from app.models.log import Log
+from app.utils.log_messages import log_row
+from app.utils.conditional import resource_versions
+from app.models.users.ResetToken import ResetToken
+from app.config import LOG_ARCHIVE_DIR, RETENTION_CHUNK_SIZE, RETENTION_CHUNK_PAUSE
+
+def archive_path(day: date, archive_dir: str = LOG_ARCHIVE_DIR) -> str:
+    """
+    Un fichier JSONL compressé par jour : <archive_dir>/AAAA/MM/logs-AAAA-MM-JJ.jsonl.gz
+    """
+    return os.path.join(archive_dir, f"{day:%Y}", f"{day:%m}", f"logs-{day:%Y-%m-%d}.jsonl.gz")
+
+def _serialize(row) -> dict:
+    # Les archives gardent la description rendue : lisibles sans le code de l'application
+    entry = log_row(row.id, row.user_id, row.action, row.details, row.created_at)
+    entry["created_at"] = row.created_at.isoformat()
+    return entry
+
+def _write_archive(rows, archive_dir: str) -> set:
+    by_day = defaultdict(list)
+    for row in rows:
+        by_day[row.created_at.date()].append(_serialize(row))
+    paths = set()
+    for day, entries in by_day.items():
+        path = archive_path(day, archive_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Chaque lot ajoute un membre gzip au fichier du jour ; l'écriture est rendue durable avant la purge
+        with open(path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="ab") as archive:
+                archive.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries).encode("utf-8"))
+            raw.flush()
+            os.fsync(raw.fileno())
+        paths.add(path)
+    return paths
+
+def archive_and_purge_logs(older_than: datetime, archive_dir: str = LOG_ARCHIVE_DIR,
+                           chunk_size: int = RETENTION_CHUNK_SIZE, pause: float = RETENTION_CHUNK_PAUSE) -> dict:
+    """
+    Archive puis supprime les logs antérieurs à older_than, par lots ordonnés sur la clé primaire.
+    Chaque lot est une transaction courte (peu de verrous) ; les compteurs agrégés
+    (log_action_counts) sont conservés pour garder l'historique des statistiques.
+    """
+    archived = 0
+    files = set()
+    last_id = 0
+    while True:
+        with engine.connect() as connection:
+            rows = connection.execute(
+                select(Log.id, Log.user_id, Log.action, Log.details, Log.created_at)
+                .where(Log.created_at < older_than, Log.id > last_id)
+                .order_by(Log.id)
+                .limit(chunk_size)
+            ).all()
+        if not rows:
+            break
+        files |= _write_archive(rows, archive_dir)
+        with engine.begin() as connection:
+            connection.execute(delete(Log).where(Log.id.in_([row.id for row in rows])))
+        # Suppression Core, hors des écouteurs de session : invalider les ETag de GET /logs/ comme LogSink._flush.
+        # Sans Redis, le script a ses propres versions : les workers voient la purge au plus tard après
+        # ETAG_LOCAL_MAX_STALENESS secondes.
+        resource_versions.bump("logs")
+        archived += len(rows)
+        last_id = rows[-1].id
+        time.sleep(pause)
+    return {"archived": archived, "files": sorted(files)}
+
+def purge_reset_tokens(now: datetime | None = None, chunk_size: int = RETENTION_CHUNK_SIZE,
+                       pause: float = RETENTION_CHUNK_PAUSE) -> int:
+    """
+    Supprime les tokens de réinitialisation utilisés ou expirés, par lots ordonnés sur la clé primaire
+    """
+    now = now or datetime.utcnow()
+    deleted = 0
+    while True:
+        with engine.begin() as connection:
+            ids = connection.scalars(
+                select(ResetToken.id)
+                .where(or_(ResetToken.used.is_(True), ResetToken.expires_at < now))
+                .order_by(ResetToken.id)
+                .limit(chunk_size)
+            ).all()
+            if not ids:
+                break
+            connection.execute(delete(ResetToken).where(ResetToken.id.in_(ids)))
+        deleted += len(ids)
+        time.sleep(pause)
+    return deleted
+
+def iter_archived_logs(since: datetime, until: datetime, action: str | None = None, user_id: int | None = None,
+                       archive_dir: str = LOG_ARCHIVE_DIR):
+    """
+    Parcourt les archives des jours couverts par [since, until), dans l'ordre chronologique des fichiers
+    """
+    day = since.date()
+    while day <= until.date():
+        path = archive_path(day, archive_dir)
+        if os.path.exists(path):
+            # Un lot réarchivé après une purge interrompue peut apparaître deux fois
+            seen = set()
+            with gzip.open(path, "rt", encoding="utf-8") as archive:
+                for line in archive:
+                    entry = json.loads(line)
+                    if entry["id"] in seen:
+                        continue
+                    seen.add(entry["id"])
+                    created_at = datetime.fromisoformat(entry["created_at"])
+                    if not since <= created_at < until:
+                        continue
+                    if action and entry["action"] != action:
+                        continue
+                    if user_id is not None and entry["user_id"] != user_id:
+                        continue
+                    yield entry
+        day += timedelta(days=1)
@@ -0,0 +1,173 @@
+"""
+Révocation des JWT avant leur expiration, sans lecture en base.
+
+Deux niveaux : un token précis (claim jti, à la déconnexion) et toutes les sessions d'un utilisateur
+(tokens émis avant un instant donné, claim iat : changement de mot de passe, suppression du compte).
+Une entrée n'est gardée que jusqu'à l'expiration des tokens qu'elle concerne.
+"""
+import hashlib
+import math
+import threading
+import time
+from app.config import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REVOCATION_BLOOM_CAPACITY,
+    REVOCATION_BLOOM_ERROR_RATE,
+    REVOCATION_REDIS_URL
+)
+
+TOKEN_LIFETIME = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+class BloomFilter:
+    """
+    Filtre de Bloom : « absent » est certain, « présent » peut être un faux positif (taux error_rate
+    à capacity éléments). Nombre de sondages fixe, quelle que soit la taille de l'ensemble.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        # Double hachage : k positions dérivées de deux valeurs de 64 bits
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class MemoryRevocationStore:
+    """
+    Révocations propres au worker : filtre de Bloom devant un dictionnaire jti -> expiration.
+    Le cas courant (token non révoqué) s'arrête au filtre ; le filtre, qui ne sait pas retirer
+    d'élément, est reconstruit à partir des entrées encore valides lors des purges.
+    """
+
+    def __init__(self, capacity=REVOCATION_BLOOM_CAPACITY, error_rate=REVOCATION_BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._tokens = {}
+        self._users = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._bloom_capacity = capacity  # Entrées prévues pour le filtre courant (taux d'erreur garanti jusque-là)
+        self._lock = threading.Lock()
+        self._next_purge = time.time() + TOKEN_LIFETIME
+        self.bloom_false_positives = 0
+        self.rebuilds = 0
+
+    def _purge(self, now: float):
+        self._tokens = {jti: expires for jti, expires in self._tokens.items() if expires > now}
+        self._users = {user: (before, expires) for user, (before, expires) in self._users.items() if expires > now}
+        # Capacité doublée par rapport aux entrées restantes : la reconstruction suivante pour cause de
+        # filtre plein n'a lieu qu'après autant de nouvelles révocations (coût amorti constant)
+        self._bloom_capacity = max(self.capacity, len(self._tokens) * 2)
+        self._bloom = BloomFilter(self._bloom_capacity, self.error_rate)
+        for jti in self._tokens:
+            self._bloom.add(jti)
+        self._next_purge = now + TOKEN_LIFETIME
+        self.rebuilds += 1
+
+    async def revoke_token(self, jti: str, expires_at: float):
+        now = time.time()
+        with self._lock:
+            # Entrées expirées retirées périodiquement ; plus tôt si le filtre dépasse sa capacité prévue.
+            # Les révocations encore valides ne sont jamais évincées.
+            if now >= self._next_purge or len(self._tokens) >= self._bloom_capacity:
+                self._purge(now)
+            self._tokens[jti] = expires_at
+            self._bloom.add(jti)
+
+    async def revoke_user(self, user_id: str, before: float):
+        with self._lock:
+            self._users[user_id] = (before, before + TOKEN_LIFETIME)
+
+    async def is_revoked(self, jti: str | None, user_id: str, issued_at: float) -> bool:
+        revoked_user = self._users.get(user_id)
+        if revoked_user is not None and issued_at <= revoked_user[0]:
+            return True
+        if jti is None or jti not in self._bloom:
+            return False
+        expires = self._tokens.get(jti)
+        if expires is None:
+            self.bloom_false_positives += 1
+            return False
+        return expires > time.time()
+
+    def stats(self) -> dict:
+        return {
+            "revoked_tokens": len(self._tokens),
+            "revoked_users": len(self._users),
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hashes,
+            "bloom_false_positives": self.bloom_false_positives,
+            "bloom_rebuilds": self.rebuilds,
+        }
+
+class RedisRevocationStore:
+    """
+    Révocations partagées entre workers : une clé par token ou par utilisateur, expirant avec les tokens
+    concernés ; une seule requête Redis (pipeline) par vérification
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis  # Dépendance optionnelle
+        self.redis = redis.from_url(url)
+
+    async def revoke_token(self, jti: str, expires_at: float):
+        ttl = int(expires_at - time.time()) + 1
+        if ttl > 0:
+            await self.redis.set(f"revoked:token:{jti}", 1, ex=ttl)
+
+    async def revoke_user(self, user_id: str, before: float):
+        await self.redis.set(f"revoked:user:{user_id}", repr(before), ex=TOKEN_LIFETIME + 1)
+
+    async def is_revoked(self, jti: str | None, user_id: str, issued_at: float) -> bool:
+        pipeline = self.redis.pipeline()
+        pipeline.get(f"revoked:user:{user_id}")
+        pipeline.exists(f"revoked:token:{jti}" if jti else "revoked:token:")
+        before, token_revoked = await pipeline.execute()
+        return bool(token_revoked) or (before is not None and issued_at <= float(before))
+
+    def stats(self) -> dict:
+        return {}
+
+class TokenRevocation:
+    """
+    Point d'entrée des routes : extrait jti, sub, iat et exp des claims d'un token décodé
+    """
+
+    def __init__(self, redis_url=REVOCATION_REDIS_URL):
+        self.backend = RedisRevocationStore(redis_url) if redis_url else MemoryRevocationStore()
+        self.rejected = 0
+
+    async def revoke(self, payload: dict):
+        """
+        Révoque un token (déconnexion) jusqu'à son expiration
+        """
+        if payload.get("jti"):
+            await self.backend.revoke_token(payload["jti"], float(payload.get("exp", time.time() + TOKEN_LIFETIME)))
+
+    async def revoke_user(self, user_id):
+        """
+        Révoque toutes les sessions ouvertes de l'utilisateur (tokens émis jusqu'à maintenant)
+        """
+        await self.backend.revoke_user(str(user_id), time.time())
+
+    async def is_revoked(self, payload: dict) -> bool:
+        # Tokens émis avant l'ajout de iat : considérés comme émis à l'origine des temps
+        revoked = await self.backend.is_revoked(payload.get("jti"), str(payload.get("sub")), float(payload.get("iat", 0)))
+        if revoked:
+            self.rejected += 1
+        return revoked
+
+    def stats(self) -> dict:
+        return {"backend": type(self.backend).__name__, "rejected": self.rejected, **self.backend.stats()}
+
+token_revocation = TokenRevocation()
@@ -0,0 +1,16 @@
+from fastapi.responses import ORJSONResponse
+
+def rows_as_dicts(result) -> list[dict]:
+    """
+    Convertit le résultat d'une requête projetée sur des colonnes en dictionnaires,
+    sans instancier d'objets ORM (ni identity map, ni validation Pydantic ligne par ligne)
+    """
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+def fast_json(content, **kwargs) -> ORJSONResponse:
+    """
+    Réponse sérialisée par orjson (datetime et Enum pris en charge nativement).
+    Le contenu doit déjà avoir la forme du response_model déclaré sur la route : il n'est pas revalidé.
+    """
+    return ORJSONResponse(content, **kwargs)
@@ -0,0 +1,59 @@
+from sqlalchemy import event, select, func, or_
+from sqlalchemy.orm import Session
+from app.models.users.user import User
+from app.utils.cache import TTLCache
+from app.config import USER_COUNT_CACHE_SIZE, USER_COUNT_CACHE_TTL
+
+# Totaux par combinaison de filtres (department, role, préfixe)
+user_count_cache = TTLCache(USER_COUNT_CACHE_SIZE, USER_COUNT_CACHE_TTL)
+
+def _prefix_pattern(prefix: str) -> str:
+    # Les jokers saisis par l'utilisateur sont pris littéralement
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def apply_user_filters(query, department, role, prefix: str | None):
+    """
+    Filtres de l'annuaire : département, rôle et préfixe d'email, de prénom ou de nom.
+    Un LIKE 'préfixe%' reste un parcours d'intervalle sur les index de ces colonnes.
+    """
+    if department is not None:
+        query = query.filter(User.department == department)
+    if role is not None:
+        query = query.filter(User.role == role)
+    if prefix:
+        pattern = _prefix_pattern(prefix)
+        query = query.filter(or_(
+            User.email.like(pattern, escape="\\"),
+            User.lastName.like(pattern, escape="\\"),
+            User.firstName.like(pattern, escape="\\"),
+        ))
+    return query
+
+async def count_users(db, department, role, prefix: str | None) -> int:
+    """
+    Nombre d'utilisateurs correspondant aux filtres, mis en cache (invalidé à chaque écriture sur users)
+    """
+    key = (department, role, prefix or None)
+    total = user_count_cache.get(key)
+    if total is None:
+        total = await db.scalar(apply_user_filters(select(func.count(User.id)), department, role, prefix))
+        user_count_cache.set(key, total)
+    return total
+
+def invalidate_user_counts():
+    user_count_cache.clear()
+
+# Toute écriture ORM sur users vide le cache des totaux une fois la transaction validée
+@event.listens_for(Session, "after_flush")
+def _mark_users_changed(session, flush_context):
+    if any(isinstance(obj, User) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["users_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def _clear_counts_on_commit(session):
+    if session.info.pop("users_changed", False):
+        invalidate_user_counts()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_users_changed(session):
+    session.info.pop("users_changed", None)
@@ -0,0 +1,53 @@
+"""
+Micro-benchmark du moteur de règles de fraude : débit de notation sur un cœur (objectif > 50 000 transactions/s).
+
+Mesure séparément la mise en colonnes (TransactionColumns.from_rows) et l'évaluation vectorisée.
+
+Usage : python -m benchmarks.fraud_rules [--batch 10000] [--repeat 20]
+"""
+import argparse
+import random
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from app.utils.fraud_rules import FraudRules, TransactionColumns
+
+COUNTRIES = ["FR", "DE", "ES", "IT", "US", "GB", "KP", "IR", "BE", "NL"]
+MERCHANTS = [f"Merchant {index}" for index in range(500)]
+
+def sample_rows(count: int) -> list:
+    start = datetime(2026, 1, 1)
+    return [
+        SimpleNamespace(
+            amount=Decimal(random.randint(100, 2_000_000)) / 100,
+            country=random.choice(COUNTRIES),
+            merchant=random.choice(MERCHANTS),
+            occurred_at=start + timedelta(seconds=random.randint(0, 86400 * 30)),
+        )
+        for _ in range(count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    rules = FraudRules(blocked_countries=("KP", "IR"), blocked_merchants=("merchant 13", "merchant 42"),
+                       night_start_hour=22, night_end_hour=5)
+    rows = sample_rows(args.batch)
+    columns = TransactionColumns.from_rows(rows)
+
+    transpose = min(timeit.repeat(lambda: TransactionColumns.from_rows(rows), number=1, repeat=args.repeat))
+    evaluate = min(timeit.repeat(lambda: rules.evaluate(columns), number=1, repeat=args.repeat))
+    scores, _ = rules.evaluate(columns)
+
+    print(f"Lot              : {args.batch} transactions, {int(rules.alerts(scores).sum())} alertes")
+    print(f"Mise en colonnes : {transpose * 1000:8.2f} ms ({args.batch / transpose:,.0f} transactions/s)")
+    print(f"Évaluation       : {evaluate * 1000:8.2f} ms ({args.batch / evaluate:,.0f} transactions/s)")
+    print(f"Total            : {args.batch / (transpose + evaluate):,.0f} transactions/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+from logging.config import fileConfig
+from alembic import context
+from app.database import Base, engine
+# Import des modèles : enregistre toutes les tables dans Base.metadata (autogenerate)
+from app.models.users.user import User  # noqa: F401
+from app.models.users.ResetToken import ResetToken  # noqa: F401
+from app.models.log import Log, LogActionName, LogActionCount  # noqa: F401
+from app.models.email_outbox import EmailOutbox  # noqa: F401
+from app.models.transaction import Transaction  # noqa: F401
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def run_migrations_offline():
+    """
+    Génère le SQL sans se connecter (alembic upgrade head --sql)
+    """
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def _run(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite ne sait pas modifier une colonne : recopie de la table (mode batch)
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    # Connexion fournie par l'appelant (config.attributes["connection"], ex. tests), sinon base de l'application
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+    with engine.connect() as connection:
+        _run(connection)
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,59 @@
+"""Schéma initial, celui d'origine de l'application : utilisateurs, jetons de réinitialisation, logs
+
+Une base existante créée avant Alembic est marquée à cette révision (alembic stamp 0001_initial) ;
+les tables et index ajoutés ensuite sont créés par 0001a_log_counts_and_outbox s'ils manquent.
+
+Revision ID: 0001_initial
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_initial"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("password", sa.String(255), nullable=True),
+        sa.Column("firstName", sa.String(255), nullable=False),
+        sa.Column("lastName", sa.String(255), nullable=False),
+        sa.Column("phoneNumber", sa.String(50), nullable=True),
+        sa.Column("department", sa.Enum("IT", "FINANCE", "HR", "MARKETING", name="analystdepartment"), nullable=False),
+        sa.Column("role", sa.Enum("ADMIN", "ANALYST", name="role"), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "reset_tokens",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("token", sa.String(255), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("used", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_reset_tokens_id", "reset_tokens", ["id"])
+    op.create_index("ix_reset_tokens_token", "reset_tokens", ["token"], unique=True)
+
+    op.create_table(
+        "logs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("action", sa.String(50), nullable=False),
+        sa.Column("description", sa.String(255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_logs_id", "logs", ["id"])
+
+def downgrade():
+    op.drop_table("logs")
+    op.drop_table("reset_tokens")
+    op.drop_table("users")
+    sa.Enum(name="role").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="analystdepartment").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,77 @@
+"""Index de pagination des logs, compteurs horaires de logs, outbox des emails
+
+Ajouts antérieurs à Alembic : une base créée par le create_all de ces versions les possède déjà,
+une base d'origine non. Seuls les tables et index manquants sont créés, pour que les deux puissent
+être marquées à 0001_initial puis mises à jour.
+Les compteurs d'une base d'origine se remplissent ensuite avec python -m app.scripts.rebuild_log_counts.
+
+Revision ID: 0001a_log_counts_and_outbox
+Revises: 0001_initial
+Create Date: 2026-10-17
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001a_log_counts_and_outbox"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+LOG_INDEXES = {
+    "ix_logs_created_at_id": ["created_at", "id"],
+    "ix_logs_action_created_at_id": ["action", "created_at", "id"],
+    "ix_logs_user_id_created_at_id": ["user_id", "created_at", "id"],
+}
+
+logs = sa.table("logs", sa.column("created_at", sa.DateTime))
+
+def upgrade():
+    # Génération du SQL (--sql) : pas de base à inspecter, le script part du schéma d'origine
+    inspector = None if op.get_context().as_sql else sa.inspect(op.get_bind())
+
+    # created_at n'avait qu'une valeur par défaut côté Python : la colonne devient obligatoire
+    op.execute(logs.update().where(logs.c.created_at.is_(None)).values(created_at=datetime.utcnow()))
+    existing = {index["name"] for index in inspector.get_indexes("logs")} if inspector else set()
+    with op.batch_alter_table("logs") as batch:
+        batch.alter_column("created_at", existing_type=sa.DateTime(), nullable=False)
+        for name, columns in LOG_INDEXES.items():
+            if name not in existing:
+                batch.create_index(name, columns)
+
+    tables = set(inspector.get_table_names()) if inspector else set()
+    if "log_action_counts" not in tables:
+        op.create_table(
+            "log_action_counts",
+            sa.Column("action", sa.String(50), primary_key=True),
+            sa.Column("bucket", sa.DateTime(), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False),
+        )
+
+    if "email_outbox" not in tables:
+        op.create_table(
+            "email_outbox",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("recipient", sa.String(255), nullable=False),
+            sa.Column("subject", sa.String(255), nullable=False),
+            sa.Column("body", sa.Text(), nullable=False),
+            sa.Column("status", sa.Enum("PENDING", "SENDING", "SENT", "FAILED", name="emailstatus"), nullable=False),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+            sa.Column("claim_token", sa.String(36), nullable=True),
+            sa.Column("claimed_at", sa.DateTime(), nullable=True),
+            sa.Column("last_error", sa.String(500), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("sent_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_email_outbox_id", "email_outbox", ["id"])
+        op.create_index("ix_email_outbox_status_next_attempt_at", "email_outbox", ["status", "next_attempt_at"])
+
+def downgrade():
+    op.drop_table("email_outbox")
+    sa.Enum(name="emailstatus").drop(op.get_bind(), checkfirst=True)
+    op.drop_table("log_action_counts")
+    with op.batch_alter_table("logs") as batch:
+        for name in reversed(list(LOG_INDEXES)):
+            batch.drop_index(name)
+        batch.alter_column("created_at", existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,24 @@
+"""Index de l'annuaire des utilisateurs (filtres département/rôle, recherche par préfixe de nom)
+
+Revision ID: 0002_user_directory_indexes
+Revises: 0001a_log_counts_and_outbox
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0002_user_directory_indexes"
+down_revision = "0001a_log_counts_and_outbox"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index("ix_users_department_role_id", "users", ["department", "role", "id"])
+    op.create_index("ix_users_role_id", "users", ["role", "id"])
+    op.create_index("ix_users_lastName_firstName", "users", ["lastName", "firstName"])
+    op.create_index("ix_users_firstName", "users", ["firstName"])
+
+def downgrade():
+    op.drop_index("ix_users_firstName", table_name="users")
+    op.drop_index("ix_users_lastName_firstName", table_name="users")
+    op.drop_index("ix_users_role_id", table_name="users")
+    op.drop_index("ix_users_department_role_id", table_name="users")
@@ -0,0 +1,147 @@
+"""Stockage compact des logs : action sur un SMALLINT (table log_actions), détails en JSON
+
+Convertit les lignes existantes par lots ordonnés sur la clé primaire (mémoire et taille des requêtes bornées) :
+action texte -> code, description -> {"text": ...} (rendue telle quelle à la lecture).
+Une action historique hors catalogue devient le code 0 (unknown) et son nom est conservé dans les détails.
+
+Revision ID: 0003_compact_log_storage
+Revises: 0002_user_directory_indexes
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_compact_log_storage"
+down_revision = "0002_user_directory_indexes"
+branch_labels = None
+depends_on = None
+
+# Catalogue figé à la date de la migration (voir LogAction dans app/models/enum/enums.py)
+ACTIONS = {
+    "unknown": 0,
+    "login_success": 1,
+    "login_failed": 2,
+    "update_profile_success": 3,
+    "update_profile_failed": 4,
+    "change_password_success": 5,
+    "change_password_failed": 6,
+}
+UNKNOWN = 0
+CHUNK_SIZE = 5000
+
+logs = sa.table(
+    "logs",
+    sa.column("id", sa.Integer),
+    sa.column("action", sa.String),
+    sa.column("description", sa.String),
+    sa.column("action_id", sa.SmallInteger),
+    sa.column("details", sa.JSON(none_as_null=True)),
+)
+
+def _convert_logs(connection):
+    update = (
+        sa.update(logs)
+        .where(logs.c.id == sa.bindparam("b_id"))
+        .values(action_id=sa.bindparam("b_action_id"), details=sa.bindparam("b_details", type_=sa.JSON(none_as_null=True)))
+    )
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(logs.c.id, logs.c.action, logs.c.description)
+            # Lignes non encore converties : une migration interrompue (MySQL, DDL non transactionnel) reprend où elle s'est arrêtée
+            .where(logs.c.id > last_id, logs.c.action_id.is_(None))
+            .order_by(logs.c.id)
+            .limit(CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for row in rows:
+            code = ACTIONS.get(row.action, UNKNOWN)
+            details = {}
+            if row.description is not None:
+                details["text"] = row.description
+            if code == UNKNOWN:
+                details["legacy_action"] = row.action
+            params.append({"b_id": row.id, "b_action_id": code, "b_details": details or None})
+        connection.execute(update, params)
+        last_id = rows[-1].id
+
+def upgrade():
+    log_actions = op.create_table(
+        "log_actions",
+        sa.Column("id", sa.SmallInteger(), primary_key=True, autoincrement=False),
+        sa.Column("name", sa.String(50), nullable=False, unique=True),
+    )
+    op.bulk_insert(log_actions, [{"id": code, "name": name} for name, code in ACTIONS.items()])
+
+    with op.batch_alter_table("logs") as batch:
+        batch.add_column(sa.Column("action_id", sa.SmallInteger(), nullable=True))
+        batch.add_column(sa.Column("details", sa.JSON(), nullable=True))
+
+    _convert_logs(op.get_bind())
+
+    with op.batch_alter_table("logs") as batch:
+        batch.drop_index("ix_logs_action_created_at_id")
+        batch.drop_column("action")
+        batch.drop_column("description")
+        batch.alter_column("action_id", existing_type=sa.SmallInteger(), nullable=False)
+        batch.create_index("ix_logs_action_id_created_at_id", ["action_id", "created_at", "id"])
+
+    # Compteurs horaires : même conversion ; les compteurs d'actions hors catalogue sont regroupés sous "unknown"
+    old_counts = sa.table("log_action_counts", sa.column("action", sa.String), sa.column("bucket", sa.DateTime), sa.column("count", sa.Integer))
+    new_counts = op.create_table(
+        "log_action_counts_new",
+        sa.Column("action_id", sa.SmallInteger(), primary_key=True),
+        sa.Column("bucket", sa.DateTime(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+    code = sa.case(ACTIONS, value=old_counts.c.action, else_=UNKNOWN)
+    op.execute(new_counts.insert().from_select(
+        ["action_id", "bucket", "count"],
+        sa.select(code, old_counts.c.bucket, sa.func.sum(old_counts.c["count"])).group_by(code, old_counts.c.bucket)
+    ))
+    op.drop_table("log_action_counts")
+    op.rename_table("log_action_counts_new", "log_action_counts")
+
+def downgrade():
+    names = {code: name for name, code in ACTIONS.items()}
+    with op.batch_alter_table("logs") as batch:
+        batch.add_column(sa.Column("action", sa.String(50), nullable=True))
+        batch.add_column(sa.Column("description", sa.String(255), nullable=True))
+    connection = op.get_bind()
+    connection.execute(
+        sa.update(logs).values(action=sa.case(names, value=logs.c.action_id, else_="unknown"))
+    )
+    # Seules les descriptions d'origine (format migré) peuvent être restaurées sans le code de rendu
+    rows = connection.execute(sa.select(logs.c.id, logs.c.details).where(logs.c.details.is_not(None))).all()
+    restore = [
+        {"b_id": row.id, "b_description": row.details.get("text")}
+        for row in rows if isinstance(row.details, dict) and row.details.get("text")
+    ]
+    if restore:
+        connection.execute(
+            sa.update(logs).where(logs.c.id == sa.bindparam("b_id")).values(description=sa.bindparam("b_description")),
+            restore
+        )
+    with op.batch_alter_table("logs") as batch:
+        batch.drop_index("ix_logs_action_id_created_at_id")
+        batch.drop_column("action_id")
+        batch.drop_column("details")
+        batch.alter_column("action", existing_type=sa.String(50), nullable=False)
+        batch.create_index("ix_logs_action_created_at_id", ["action", "created_at", "id"])
+
+    old_counts = sa.table("log_action_counts", sa.column("action_id", sa.SmallInteger), sa.column("bucket", sa.DateTime), sa.column("count", sa.Integer))
+    restored = op.create_table(
+        "log_action_counts_old",
+        sa.Column("action", sa.String(50), primary_key=True),
+        sa.Column("bucket", sa.DateTime(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+    op.execute(restored.insert().from_select(
+        ["action", "bucket", "count"],
+        sa.select(sa.case(names, value=old_counts.c.action_id, else_="unknown"), old_counts.c.bucket, old_counts.c["count"])
+    ))
+    op.drop_table("log_action_counts")
+    op.rename_table("log_action_counts_old", "log_action_counts")
+    op.drop_table("log_actions")
@@ -0,0 +1,57 @@
+"""Transactions notées par le moteur de règles, et action d'audit fraud_alert
+
+Revision ID: 0004_transactions
+Revises: 0003_compact_log_storage
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_transactions"
+down_revision = "0003_compact_log_storage"
+branch_labels = None
+depends_on = None
+
+# Code figé (voir LogAction dans app/models/enum/enums.py)
+FRAUD_ALERT = 7
+UNKNOWN = 0
+
+log_actions = sa.table("log_actions", sa.column("id", sa.SmallInteger), sa.column("name", sa.String))
+
+def upgrade():
+    op.create_table(
+        "transactions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("external_id", sa.String(64), nullable=False),
+        sa.Column("account_id", sa.String(64), nullable=False),
+        sa.Column("amount", sa.Numeric(14, 2), nullable=False),
+        sa.Column("currency", sa.String(3), nullable=False),
+        sa.Column("country", sa.String(2), nullable=False),
+        sa.Column("merchant", sa.String(100), nullable=False),
+        sa.Column("occurred_at", sa.DateTime(), nullable=False),
+        sa.Column("fraud_score", sa.SmallInteger(), nullable=False),
+        sa.Column("triggered_rules", sa.SmallInteger(), nullable=False),
+        sa.Column("is_fraud", sa.Boolean(), nullable=False),
+        sa.Column("ingested_by", sa.Integer(), sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_transactions_id", "transactions", ["id"])
+    op.create_index("ix_transactions_external_id", "transactions", ["external_id"], unique=True)
+    op.create_index("ix_transactions_is_fraud_occurred_at", "transactions", ["is_fraud", "occurred_at"])
+    op.create_index("ix_transactions_account_id_occurred_at", "transactions", ["account_id", "occurred_at"])
+
+    op.bulk_insert(log_actions, [{"id": FRAUD_ALERT, "name": "fraud_alert"}])
+
+def downgrade():
+    # Les alertes déjà journalisées restent lisibles par l'ancien code sous l'action "unknown"
+    logs = sa.table("logs", sa.column("action_id", sa.SmallInteger))
+    counts = sa.table("log_action_counts", sa.column("action_id", sa.SmallInteger))
+    op.execute(sa.update(logs).where(logs.c.action_id == FRAUD_ALERT).values(action_id=UNKNOWN))
+    op.execute(sa.delete(counts).where(counts.c.action_id == FRAUD_ALERT))
+    op.execute(sa.delete(log_actions).where(log_actions.c.id == FRAUD_ALERT))
+
+    op.drop_index("ix_transactions_account_id_occurred_at", table_name="transactions")
+    op.drop_index("ix_transactions_is_fraud_occurred_at", table_name="transactions")
+    op.drop_index("ix_transactions_external_id", table_name="transactions")
+    op.drop_index("ix_transactions_id", table_name="transactions")
+    op.drop_table("transactions")
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Bases SQLite jetables, définies avant tout import de app.database (moteurs créés à l'import).
+# La réplique pointe vers un dossier inexistant : injoignable, pour vérifier le repli sur le primaire.
+_db_dir = tempfile.mkdtemp(prefix="app-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'test.db')}")
+os.environ.setdefault("REPLICA_DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'missing', 'replica.db')}")
@@ -0,0 +1,43 @@
+"""
+Import en masse : un email déjà enregistré est reconnu quelle que soit sa casse.
+"""
+import asyncio
+import json
+from sqlalchemy import delete, func, select
+from starlette.requests import Request
+from app.database import Base, engine, AsyncSessionLocal
+from app.models.users.user import User
+from app.models.users.ResetToken import ResetToken
+from app.models.email_outbox import EmailOutbox
+from app.models.enum.enums import AnalystDepartment, Role
+from app.routers.users import bulk_create_users
+from app.utils.principal import Principal
+
+def _request(rows) -> Request:
+    body = json.dumps(rows).encode()
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    return Request({"type": "http", "method": "POST", "headers": [(b"content-type", b"application/json")]}, receive)
+
+def test_existing_email_matches_case_insensitively():
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(delete(EmailOutbox))
+        connection.execute(delete(ResetToken))
+        connection.execute(delete(User))
+        connection.execute(User.__table__.insert().values(
+            email="Known.User@example.com", firstName="A", lastName="B", department=AnalystDepartment.IT, role=Role.ANALYST
+        ))
+    admin = Principal(id=0, role=Role.ADMIN, department=AnalystDepartment.IT)
+    rows = [{"email": "known.user@example.com", "firstName": "A", "lastName": "B", "department": "IT", "role": "analyst"}]
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await bulk_create_users(_request(rows), db, admin)
+    response = asyncio.run(run())
+
+    assert response.created == 0
+    assert [result.status for result in response.results] == ["exists"]
+    with engine.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(User)) == 1
@@ -0,0 +1,41 @@
+"""
+Suppression d'un utilisateur invité (jeton de réinitialisation en attente) et révocation de ses sessions.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, select
+from app.database import Base, engine, AsyncSessionLocal
+from app.models.users.user import User
+from app.models.users.ResetToken import ResetToken
+from app.models.enum.enums import AnalystDepartment, Role
+from app.routers.users import delete_user
+from app.utils.principal import Principal
+from app.utils.revocation import token_revocation
+
+def test_delete_invited_user_removes_reset_tokens_and_revokes_sessions():
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(delete(ResetToken))
+        connection.execute(delete(User))
+        connection.execute(User.__table__.insert().values(
+            email="invited@example.com", firstName="A", lastName="B", department=AnalystDepartment.IT, role=Role.ANALYST
+        ))
+        user_id = connection.scalar(select(User.id).where(User.email == "invited@example.com"))
+        connection.execute(ResetToken.__table__.insert().values(
+            user_id=user_id, token="invitation", expires_at=datetime.utcnow() + timedelta(hours=1), used=False
+        ))
+    admin = Principal(id=0, role=Role.ADMIN, department=AnalystDepartment.IT)
+    issued_before = datetime.utcnow().timestamp() - 1
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            response = await delete_user(user_id, db, admin)
+        revoked = await token_revocation.is_revoked({"sub": str(user_id), "iat": issued_before})
+        return response, revoked
+
+    response, revoked = asyncio.run(run())
+    assert response == {"message": "Utilisateur supprimé avec succès"}
+    assert revoked
+    with engine.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(User)) == 0
+        assert connection.scalar(select(func.count()).select_from(ResetToken)) == 0
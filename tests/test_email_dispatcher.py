@@ -0,0 +1,92 @@
+"""
+Livraison de l'outbox par un vrai serveur SMTP local (aiosmtpd) : email marqué envoyé, ou reprogrammé en cas de refus.
+"""
+import socket
+import pytest
+from sqlalchemy import delete, select
+from app.database import Base, engine
+from app.models.email_outbox import EmailOutbox
+from app.models.enum.enums import EmailStatus
+from app.utils import email
+from app.utils.email_dispatcher import EmailDispatcher
+
+controller_module = pytest.importorskip("aiosmtpd.controller")
+
+class Handler:
+    """
+    Accepte les emails reçus, sauf pour les destinataires refusés (réponse 550)
+    """
+
+    def __init__(self):
+        self.received = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("refused@"):
+            return "550 Mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received.append((envelope.rcpt_tos, envelope.content.decode("utf-8", errors="replace")))
+        return "250 Message accepted for delivery"
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = Handler()
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    monkeypatch.setattr(email, "SMTP_SERVER", controller.hostname)
+    monkeypatch.setattr(email, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(email, "SMTP_USE_TLS", False)
+    monkeypatch.setattr(email, "SMTP_PASSWORD", "")
+    yield handler
+    controller.stop()
+
+@pytest.fixture(autouse=True)
+def outbox():
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(delete(EmailOutbox))
+
+def _add(recipient):
+    with engine.begin() as connection:
+        connection.execute(EmailOutbox.__table__.insert().values(recipient=recipient, subject="Invitation", body="Bonjour"))
+
+def _stored():
+    with engine.connect() as connection:
+        return connection.execute(select(EmailOutbox)).one()
+
+def test_delivered_email_is_marked_sent(smtp_server):
+    _add("analyst@example.com")
+    dispatcher = EmailDispatcher()
+
+    assert dispatcher.dispatch_once() == 1
+    dispatcher._smtp.close()
+
+    message = _stored()
+    assert message.status == EmailStatus.SENT
+    assert message.sent_at is not None
+    assert message.attempts == 1
+    assert [rcpt_tos for rcpt_tos, _ in smtp_server.received] == [["analyst@example.com"]]
+    assert "Subject: Invitation" in smtp_server.received[0][1]
+
+def test_refused_email_is_rescheduled(smtp_server):
+    _add("refused@example.com")
+    dispatcher = EmailDispatcher(max_attempts=2, retry_base=30)
+
+    assert dispatcher.dispatch_once() == 1
+    # Pas encore dû : rien à renvoyer immédiatement
+    assert dispatcher.dispatch_once() == 0
+
+    message = _stored()
+    assert message.status == EmailStatus.PENDING
+    assert message.attempts == 1
+    assert message.next_attempt_at > message.created_at
+    assert "550" in message.last_error
+    assert smtp_server.received == []
+    assert dispatcher.stats()["retried"] == 1
@@ -0,0 +1,83 @@
+"""
+Stockage des logs d'audit : colonne action_id (clé Python "action") écrite par les deux modes du LogSink,
+compteurs horaires compris.
+"""
+import asyncio
+import pytest
+from sqlalchemy import select, delete
+from app.database import Base, engine, AsyncSessionLocal
+from app.models.users.user import User  # noqa: F401 (clé étrangère logs.user_id)
+from app.models.users.ResetToken import ResetToken  # noqa: F401 (relation de User)
+from app.models.log import Log, LogActionCount
+from app.utils.log_sink import LogSink
+from app.utils.log_rollup import rebuild_action_counts
+
+@pytest.fixture(autouse=True)
+def tables():
+    Base.metadata.create_all(engine)
+    yield
+    with engine.begin() as connection:
+        connection.execute(delete(Log))
+        connection.execute(delete(LogActionCount))
+
+def _stored():
+    with engine.connect() as connection:
+        logs = connection.execute(select(Log.action, Log.details)).all()
+        counts = dict(connection.execute(select(LogActionCount.action, LogActionCount.count)).all())
+    return logs, counts
+
+def test_models_map_action_to_action_id_column():
+    assert Log.__table__.c.action.name == "action_id"
+    assert LogActionCount.__table__.c.action.name == "action_id"
+    index = next(index for index in Log.__table__.indexes if index.name == "ix_logs_action_id_created_at_id")
+    assert [column.name for column in index.columns] == ["action_id", "created_at", "id"]
+
+def test_sync_sink_writes_log_and_counts():
+    async def write():
+        async with AsyncSessionLocal() as db:
+            await LogSink(mode="sync").record(db, None, "login_failed", details={"reason": "wrong_password"})
+    asyncio.run(write())
+
+    logs, counts = _stored()
+    assert [tuple(row) for row in logs] == [("login_failed", {"reason": "wrong_password"})]
+    assert counts == {"login_failed": 1}
+
+def test_batched_sink_writes_log_and_counts():
+    sink = LogSink(mode="batched", flush_interval=0.05)
+    sink.start()
+
+    async def write():
+        async with AsyncSessionLocal() as db:
+            await sink.record(db, None, "login_success")
+            await sink.record(db, None, "login_failed", details={"reason": "unknown_email", "email": "a@b.c"})
+    asyncio.run(write())
+    sink.stop()
+
+    logs, counts = _stored()
+    assert sorted(row.action for row in logs) == ["login_failed", "login_success"]
+    assert counts == {"login_failed": 1, "login_success": 1}
+    assert sink.stats()["dropped"] == 0
+
+def test_rebuild_action_counts():
+    with engine.begin() as connection:
+        connection.execute(Log.__table__.insert(), [{"action": "login_success"}, {"action": "login_success"}])
+        rebuild_action_counts(connection)
+    assert _stored()[1] == {"login_success": 2}
+
+def test_transactional_record_bypasses_batched_queue():
+    sink = LogSink(mode="batched", flush_interval=0.05)
+    sink.start()
+
+    async def write():
+        async with AsyncSessionLocal() as db:
+            await sink.record(db, None, "fraud_alert", details={"transaction": "t-1"}, commit=False, transactional=True)
+            await db.rollback()
+            await sink.record(db, None, "fraud_alert", details={"transaction": "t-2"}, commit=False, transactional=True)
+            await db.commit()
+    asyncio.run(write())
+    sink.stop()
+
+    logs, counts = _stored()
+    assert [row.details for row in logs] == [{"transaction": "t-2"}]
+    assert counts == {"fraud_alert": 1}
+    assert sink.stats()["enqueued"] == 0
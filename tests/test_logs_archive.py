@@ -0,0 +1,31 @@
+"""
+Recherche dans les archives : bornes avec fuseau horaire comparées aux dates archivées (UTC sans fuseau).
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from sqlalchemy import delete
+from app.database import Base, engine
+from app.models.users.user import User  # noqa: F401 (clé étrangère logs.user_id)
+from app.models.users.ResetToken import ResetToken  # noqa: F401 (relation de User)
+from app.models.log import Log
+from app.models.enum.enums import AnalystDepartment, Role
+from app.routers import logs as logs_router
+from app.utils.principal import Principal
+from app.utils import retention
+
+def test_archive_search_accepts_aware_bounds(tmp_path, monkeypatch):
+    Base.metadata.create_all(engine)
+    created_at = datetime.utcnow() - timedelta(days=400)
+    with engine.begin() as connection:
+        connection.execute(delete(Log))
+        connection.execute(Log.__table__.insert(), [{"action": "login_success", "created_at": created_at}])
+    retention.archive_and_purge_logs(datetime.utcnow() - timedelta(days=30), str(tmp_path), pause=0)
+    monkeypatch.setattr(logs_router, "iter_archived_logs", partial(retention.iter_archived_logs, archive_dir=str(tmp_path)))
+    admin = Principal(id=0, role=Role.ADMIN, department=AnalystDepartment.IT)
+
+    since = (created_at - timedelta(hours=1)).replace(tzinfo=timezone.utc)
+    until = (created_at + timedelta(hours=1)).replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=2)))
+    logs = asyncio.run(logs_router.get_archived_logs(since=since, until=until, action=None, user_id=None, limit=10, current_user=admin))
+
+    assert [log["action"] for log in logs] == ["login_success"]
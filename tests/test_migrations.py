@@ -0,0 +1,55 @@
+"""
+Migrations : une base au schéma d'origine, marquée à 0001_initial, se met à jour jusqu'au schéma des modèles.
+"""
+import os
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from app.models.log import Log
+
+command = pytest.importorskip("alembic.command")
+from alembic.config import Config  # noqa: E402
+from alembic.migration import MigrationContext  # noqa: E402
+from alembic.autogenerate import compare_metadata  # noqa: E402
+from app.database import Base  # noqa: E402
+
+# Tables créées par le create_all du schéma d'origine (chaînes de 255 caractères, comme en production MySQL)
+BASELINE_SCHEMA = (
+    """CREATE TABLE users (id INTEGER NOT NULL, email VARCHAR(255) NOT NULL, password VARCHAR(255),
+    "firstName" VARCHAR(255) NOT NULL, "lastName" VARCHAR(255) NOT NULL, "phoneNumber" VARCHAR(50),
+    department VARCHAR(9) NOT NULL, role VARCHAR(7) NOT NULL, PRIMARY KEY (id))""",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    "CREATE INDEX ix_users_id ON users (id)",
+    """CREATE TABLE reset_tokens (id INTEGER NOT NULL, user_id INTEGER NOT NULL, token VARCHAR(255) NOT NULL,
+    expires_at DATETIME NOT NULL, used BOOLEAN, PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id))""",
+    "CREATE UNIQUE INDEX ix_reset_tokens_token ON reset_tokens (token)",
+    "CREATE INDEX ix_reset_tokens_id ON reset_tokens (id)",
+    """CREATE TABLE logs (id INTEGER NOT NULL, user_id INTEGER, action VARCHAR(50) NOT NULL, description VARCHAR(255),
+    created_at DATETIME, PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id))""",
+    "CREATE INDEX ix_logs_id ON logs (id)",
+)
+
+def test_stamped_baseline_upgrades_to_head(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(text(
+            "INSERT INTO logs (action, description, created_at) VALUES "
+            "('login_success', NULL, '2026-01-01 10:00:00'), ('update_profile_failed', 'Email déjà utilisé', NULL)"
+        ))
+
+    # Sans fichier de configuration : pas de fileConfig, la journalisation des autres tests reste intacte
+    config = Config()
+    config.set_main_option("script_location", os.path.join(os.path.dirname(__file__), "..", "migrations"))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.stamp(config, "0001_initial")
+        command.upgrade(config, "head")
+
+    with engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+        assert connection.execute(select(Log.action, Log.details).order_by(Log.id)).all() == [
+            ("login_success", None),
+            ("update_profile_failed", {"text": "Email déjà utilisé"}),
+        ]
+    assert {"log_action_counts", "email_outbox", "transactions"} <= set(inspect(engine).get_table_names())
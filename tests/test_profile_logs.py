@@ -0,0 +1,50 @@
+"""
+Logs de succès du profil : en mode "batched", ils ne doivent exister que si la modification est validée.
+"""
+import asyncio
+import pytest
+from sqlalchemy import delete, select
+from app.database import Base, engine, AsyncSessionLocal
+from app.models.users.user import User
+from app.models.users.ResetToken import ResetToken
+from app.models.log import Log
+from app.models.enum.enums import AnalystDepartment, Role
+from app.routers import auth
+from app.schemas.user import UserUpdateProfil
+from app.utils.log_sink import LogSink
+
+class CommitFailed(Exception):
+    pass
+
+@pytest.fixture
+def user_id():
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(delete(Log))
+        connection.execute(delete(ResetToken))
+        connection.execute(delete(User))
+        connection.execute(User.__table__.insert().values(
+            email="profile@example.com", firstName="A", lastName="B", department=AnalystDepartment.IT, role=Role.ANALYST
+        ))
+        return connection.scalar(select(User.id).where(User.email == "profile@example.com"))
+
+def test_failed_commit_leaves_no_update_profile_log(user_id, monkeypatch):
+    sink = LogSink(mode="batched", flush_interval=0.05)
+    sink.start()
+    monkeypatch.setattr(auth, "log_sink", sink)
+
+    async def failing_commit():
+        raise CommitFailed()
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            db.commit = failing_commit
+            with pytest.raises(CommitFailed):
+                await auth.update_profile(UserUpdateProfil(firstName="C"), str(user_id), db)
+    asyncio.run(run())
+    sink.stop()
+
+    with engine.connect() as connection:
+        assert connection.scalars(select(Log.action)).all() == []
+        assert connection.scalar(select(User.firstName).where(User.id == user_id)) == "A"
+    assert sink.stats()["enqueued"] == 0
@@ -0,0 +1,35 @@
+"""
+Routage des lectures : repli sur le primaire, dans la même requête, quand la réplique est injoignable.
+"""
+import asyncio
+from sqlalchemy import delete, select
+from app.database import Base, engine, get_read_db, replica_health
+from app.models.users.user import User
+from app.models.users.ResetToken import ResetToken  # noqa: F401 (relation de User)
+from app.models.enum.enums import AnalystDepartment
+
+def test_read_falls_back_to_primary_when_replica_is_down():
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(delete(User))
+        connection.execute(User.__table__.insert(), [{
+            "email": "replica@example.com", "firstName": "A", "lastName": "B",
+            "department": AnalystDepartment.IT, "role": "ANALYST",
+        }])
+    # Réplique jugée saine (dernier contrôle réussi) mais tombée depuis
+    replica_health.healthy = True
+
+    async def read():
+        dependency = get_read_db()
+        db = await anext(dependency)
+        try:
+            email = await db.scalar(select(User.email))
+            return email, db.info.get("force_primary")
+        finally:
+            await dependency.aclose()
+
+    try:
+        assert asyncio.run(read()) == ("replica@example.com", True)
+        assert replica_health.healthy is False
+    finally:
+        replica_health.healthy = False
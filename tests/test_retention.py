@@ -0,0 +1,27 @@
+"""
+Purge des logs : les ETag de GET /logs/ doivent changer après une suppression par lots.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, select
+from app.database import Base, engine
+from app.models.users.user import User  # noqa: F401 (clé étrangère logs.user_id)
+from app.models.users.ResetToken import ResetToken  # noqa: F401 (relation de User)
+from app.models.log import Log
+from app.utils.conditional import resource_versions
+from app.utils.retention import archive_and_purge_logs
+
+def test_purge_bumps_logs_version(tmp_path):
+    Base.metadata.create_all(engine)
+    old = datetime.utcnow() - timedelta(days=400)
+    with engine.begin() as connection:
+        connection.execute(delete(Log))
+        connection.execute(Log.__table__.insert(), [{"action": "login_success", "created_at": old}] * 3)
+    before = asyncio.run(resource_versions.token("logs"))
+
+    result = archive_and_purge_logs(datetime.utcnow() - timedelta(days=30), str(tmp_path), chunk_size=2, pause=0)
+
+    assert result["archived"] == 3
+    with engine.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(Log)) == 0
+    assert asyncio.run(resource_versions.token("logs")) != before
@@ -0,0 +1,21 @@
+"""
+Stockage des révocations en mémoire : filtre de Bloom plein sans reconstruction à chaque révocation.
+"""
+import asyncio
+import time
+from app.utils.revocation import MemoryRevocationStore
+
+def test_full_store_rebuilds_filter_amortized():
+    store = MemoryRevocationStore(capacity=100, error_rate=0.01)
+    expires_at = time.time() + 3600
+
+    async def revoke(count):
+        for index in range(count):
+            await store.revoke_token(f"jti-{index}", expires_at)
+    asyncio.run(revoke(1000))
+
+    # Capacité doublée à chaque reconstruction : 100 -> 200 -> 400 -> 800 -> 1600
+    assert store.rebuilds <= 4
+    assert store.stats()["revoked_tokens"] == 1000
+    assert all(asyncio.run(store.is_revoked(f"jti-{index}", "1", time.time())) for index in (0, 500, 999))
+    assert not asyncio.run(store.is_revoked("jti-unknown", "1", time.time()))